@@ -0,0 +1,153 @@
+# Fan seeded headless games out across CPU cores for balance sweeps
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Set once per worker process by _init_worker so tasks never re-import pygame
+_game = None
+
+
+def _init_worker():
+    global _game
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import space_explorer
+    _game = space_explorer
+
+
+def bot_policy(sim):
+    # Chase the closest target's column, sidestep nearby enemy fire, always shoot
+    game = _game
+    player = sim.player
+    target_x = player.x
+    if sim.boss:
+        target_x = sim.boss.x
+    elif sim.vectorized and sim.enemies:
+        n = sim.enemies.count
+        x = sim.enemies.x[:n]
+        target_x = float(x[(abs(x - player.x) + (player.y - sim.enemies.y[:n])).argmin()])
+    elif sim.enemies:
+        target_x = min(sim.enemies, key=lambda e: abs(e.x - player.x) + (player.y - e.y)).x
+
+    if sim.vectorized:
+        threats = sim.enemy_bullets.points()
+    else:
+        threats = [(b.x, b.y) for b in sim.enemy_bullets]
+    dodge = 0
+    for bx, by in threats:
+        if 0 < player.y - by < 120 and abs(bx - player.x) < 30:
+            dodge = 1 if bx <= player.x else -1
+            break
+
+    if dodge:
+        left, right = dodge < 0, dodge > 0
+    else:
+        left, right = target_x < player.x - 5, target_x > player.x + 5
+    return game.InputState(left=left, right=right, down=player.y < game.SCREEN_HEIGHT - 100,
+                           shoot=True)
+
+
+def play_game(seed, params, max_ticks, vectorized=False):
+    game = _game
+    saved = {name: getattr(game, name) for name in params}
+    for name, value in params.items():
+        setattr(game, name, value)
+    try:
+        start = time.perf_counter()
+        sim = game.Simulation(vectorized, seed=seed)
+        sim.run(bot_policy, max_ticks)
+        elapsed = time.perf_counter() - start
+    finally:
+        for name, value in saved.items():
+            setattr(game, name, value)
+    return {
+        "seed": seed,
+        "params": params,
+        "wave": sim.wave,
+        "score": sim.player.score,
+        "died": sim.game_over,
+        "ticks": sim.tick,
+        "time_to_death": sim.tick / game.FPS if sim.game_over else None,
+        "boss_kill_times": [ticks / game.FPS for ticks in sim.boss_kill_times],
+        "wall_time": elapsed,
+    }
+
+
+def parse_grid(specs):
+    # ["KILLS_PER_WAVE=8,10", ...] -> list of {name: value} dicts (cartesian product)
+    import space_explorer
+    axes = []
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if not values:
+            raise ValueError(f"Expected NAME=v1,v2,... but got {spec!r}")
+        # A misspelt knob would only add an unused global and sweep nothing
+        if not hasattr(space_explorer, name):
+            raise ValueError(f"Unknown balance knob {name!r} in {spec!r}")
+        axes.append([(name, json.loads(v)) for v in values.split(",")])
+    return [dict(combo) for combo in itertools.product(*axes)]
+
+
+def aggregate(results):
+    groups = {}
+    for result in results:
+        key = json.dumps(result["params"], sort_keys=True)
+        groups.setdefault(key, []).append(result)
+    summary = []
+    for key, runs in groups.items():
+        deaths = [r["time_to_death"] for r in runs if r["died"]]
+        kills = [t for r in runs for t in r["boss_kill_times"]]
+        summary.append({
+            "params": json.loads(key),
+            "games": len(runs),
+            "mean_wave": sum(r["wave"] for r in runs) / len(runs),
+            "mean_score": sum(r["score"] for r in runs) / len(runs),
+            "death_rate": len(deaths) / len(runs),
+            "mean_time_to_death": sum(deaths) / len(deaths) if deaths else None,
+            "mean_boss_kill_time": sum(kills) / len(kills) if kills else None,
+        })
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded headless Space Explorer games in parallel")
+    parser.add_argument("--games", type=int, default=100, help="games per grid point")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; game i uses seed + i")
+    parser.add_argument("--max-ticks", type=int, default=60 * 60 * 10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=v1,v2",
+                        help="sweep a space_explorer constant; repeat for a cartesian grid")
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--out", help="JSON Lines file for per-game results (default: stdout)")
+    args = parser.parse_args(argv)
+
+    grid = parse_grid(args.grid)
+    tasks = [(args.seed + i, params) for params in grid for i in range(args.games)]
+    out = open(args.out, "w") if args.out else sys.stdout
+    results = []
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(args.workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(play_game, seed, params, args.max_ticks, args.vectorized)
+                       for seed, params in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    for row in aggregate(results):
+        print(json.dumps(row), file=sys.stderr)
+    print(f"{len(results)} games in {elapsed:.1f}s on {args.workers} workers", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# Stress-scenario benchmarks for the update, collision and draw hot paths
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import space_explorer as se
+from bullet_patterns import AimedFan, Ring, Spiral
+from waves import compile_campaign
+
+SEED = 1234
+SWARM_CAMPAIGN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "campaigns", "swarm.json")
+SHOOT = se.InputState(shoot=True)
+
+
+def _fill_enemies(sim, count):
+    rng = sim.rng
+    for _ in range(count):
+        archetype = sim.wave_plan.pick(rng.random())
+        enemy = se.Enemy(rng.uniform(20, se.SCREEN_WIDTH - 20), rng.uniform(0, se.SCREEN_HEIGHT - 200),
+                         archetype.name, rng, archetype)
+        sim.enemies.append(enemy)
+
+
+def _fill_player_bullets(sim, count):
+    rng = sim.rng
+    for _ in range(count):
+        sim.bullets.spawn(rng.uniform(0, se.SCREEN_WIDTH), rng.uniform(0, se.SCREEN_HEIGHT), 0, -8, se.YELLOW)
+
+
+def swarm(sim):
+    # 500 enemies on screen with a screenful of player fire
+    _fill_enemies(sim, 500)
+    _fill_player_bullets(sim, 200)
+
+
+def boss_storm(sim):
+    # Boss in Phase 2 with its radial volleys already filling the screen
+    sim.boss = se.Boss(se.SCREEN_WIDTH // 2, 100, sim.rng)
+    sim.boss.health = (se.BOSS_PHASE2_HEALTH + se.BOSS_PHASE3_HEALTH) // 2
+    sim.boss_spawned = True
+    for ring in range(60):
+        radius = 40 + ring * 12
+        for step in range(48):
+            angle = 2 * math.pi * step / 48
+            sim.enemy_bullets.spawn(sim.boss.x + math.cos(angle) * radius, sim.boss.y + math.sin(angle) * radius,
+                                    math.cos(angle) * 3, math.sin(angle) * 3, se.ORANGE)
+
+
+def pattern_storm(sim):
+    # Boss firing spirals, rings and aimed fans until thousands of bullets are live
+    patterns = {phase: ((Spiral(6, 3, se.ORANGE, turn=7), Ring(24, 2, se.RED),
+                         AimedFan(5, 40, 4, se.PURPLE)), 2) for phase in (1, 2, 3)}
+    sim.boss = se.Boss(se.SCREEN_WIDTH // 2, 100, sim.rng, patterns)
+    sim.boss_spawned = True
+    for _ in range(240):
+        sim.update(se.IDLE_INPUT)
+
+
+def drone_flock(sim):
+    # 400 flocking drones homing on the player, no player fire to thin them out
+    # Compiled directly rather than through load_campaign, which would write a cache
+    with open(SWARM_CAMPAIGN) as f:
+        drone = compile_campaign(json.load(f)).archetypes["drone"]
+    rng = sim.rng
+    for _ in range(400):
+        sim.enemies.append(se.Enemy(rng.uniform(20, se.SCREEN_WIDTH - 20), rng.uniform(-400, 0),
+                                    drone.name, rng, drone))
+
+
+def power_spam(sim):
+    # Weapon level 3 held down into a dense wave
+    sim.player.power_level = 3
+    _fill_enemies(sim, 150)
+    _fill_player_bullets(sim, 300)
+
+
+def mass_explosions(sim):
+    # Hundreds of simultaneous explosions
+    rng = sim.rng
+    for _ in range(200):
+        sim.create_explosion(rng.uniform(0, se.SCREEN_WIDTH), rng.uniform(0, se.SCREEN_HEIGHT), se.ORANGE, 30)
+
+
+SCENARIOS = {
+    "swarm_500": (swarm, se.IDLE_INPUT),
+    "boss_phase2_storm": (boss_storm, se.IDLE_INPUT),
+    "pattern_storm": (pattern_storm, se.IDLE_INPUT),
+    "drone_flock_400": (drone_flock, se.IDLE_INPUT),
+    "power3_spam": (power_spam, SHOOT),
+    "mass_explosions": (mass_explosions, se.IDLE_INPUT),
+}
+
+
+def build(name, vectorized):
+    setup, controls = SCENARIOS[name]
+    sim = se.Simulation(vectorized, seed=SEED)
+    sim.player.health = sim.player.max_health = 10**9
+    sim.enemy_spawn_timer = 10**9
+    setup(sim)
+    return sim, controls
+
+
+def bench_update(name, vectorized, rounds, ticks):
+    times = []
+    for _ in range(rounds):
+        sim, controls = build(name, vectorized)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            sim.update(controls)
+        times.append(time.perf_counter() - start)
+    return ticks / statistics.median(times)
+
+
+def bench_collisions(name, vectorized, rounds):
+    # Each call gets a freshly built state so hits are not consumed by earlier calls
+    times = []
+    for _ in range(rounds):
+        sim, _ = build(name, vectorized)
+        start = time.perf_counter()
+        sim.check_collisions()
+        times.append(time.perf_counter() - start)
+    return 1 / statistics.median(times)
+
+
+def bench_draw(game, name, vectorized, rounds, frames):
+    times = []
+    for _ in range(rounds):
+        game.sim, _ = build(name, vectorized)
+        start = time.perf_counter()
+        for _ in range(frames):
+            game.draw()
+        times.append(time.perf_counter() - start)
+    return frames / statistics.median(times)
+
+
+def run(scenarios, vectorized, rounds, ticks):
+    # Saves go to a throwaway directory, so a benchmark run leaves nothing behind
+    with tempfile.TemporaryDirectory() as data_dir:
+        game = se.Game(vectorized=vectorized, data_dir=data_dir)
+        try:
+            results = {}
+            for name in scenarios:
+                results[name] = {
+                    "update_tps": bench_update(name, vectorized, rounds, ticks),
+                    "check_collisions_tps": bench_collisions(name, vectorized, rounds * 4),
+                    "draw_fps": bench_draw(game, name, vectorized, rounds, ticks // 4),
+                }
+                print(f"{name:<20} " + "  ".join(f"{k}={v:9.1f}" for k, v in results[name].items()),
+                      file=sys.stderr)
+        finally:
+            game.close()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "vectorized": vectorized,
+            "rounds": rounds,
+            "ticks": ticks,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    # Returns the metrics that got slower than baseline by more than tolerance
+    regressions = []
+    for name, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            before = baseline["results"].get(name, {}).get(metric)
+            if not before:
+                continue
+            ratio = value / before
+            flag = "REGRESSION" if ratio < 1 - tolerance else ""
+            print(f"{name:<20} {metric:<22} {before:10.1f} -> {value:10.1f}  x{ratio:5.2f} {flag}",
+                  file=sys.stderr)
+            if flag:
+                regressions.append((name, metric, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Space Explorer hot paths")
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--ticks", type=int, default=120)
+    parser.add_argument("--out", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    report = run(args.scenarios or list(SCENARIOS), args.vectorized, args.rounds, args.ticks)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
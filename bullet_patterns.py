@@ -0,0 +1,100 @@
+# Parametric bullet emitters built on precomputed direction tables
+import math
+
+# Directions are whole degrees; quarter turns are exact so straight shots stay straight
+ANGLE_STEPS = 360
+UNIT_X = [math.cos(math.radians(a)) for a in range(ANGLE_STEPS)]
+UNIT_Y = [math.sin(math.radians(a)) for a in range(ANGLE_STEPS)]
+for _a in range(0, ANGLE_STEPS, 90):
+    UNIT_X[_a] = round(UNIT_X[_a])
+    UNIT_Y[_a] = round(UNIT_Y[_a])
+del _a
+
+
+def heading(dx, dy):
+    # Table index of the direction (dx, dy)
+    return round(math.degrees(math.atan2(dy, dx))) % ANGLE_STEPS
+
+
+def velocities(angles, speed):
+    # Angles are table indices; any integer is wrapped into the table
+    return ([UNIT_X[a % ANGLE_STEPS] * speed for a in angles],
+            [UNIT_Y[a % ANGLE_STEPS] * speed for a in angles])
+
+
+class Ring:
+    # count bullets evenly spaced around a full circle
+    def __init__(self, count, speed, color, start=0, offset=(0, 0)):
+        self.offset = offset
+        self.color = color
+        self.vel_x, self.vel_y = velocities([start + i * ANGLE_STEPS // count for i in range(count)], speed)
+
+    def fire(self, x, y, target, bullets, rng):
+        bullets.spawn_volley(x + self.offset[0], y + self.offset[1], self.vel_x, self.vel_y, self.color)
+
+
+class Spiral:
+    # Rings of arms bullets that rotate by turn degrees every volley
+    def __init__(self, arms, speed, color, turn=11, start=0, offset=(0, 0)):
+        self.arms = [i * ANGLE_STEPS // arms for i in range(arms)]
+        self.speed = speed
+        self.color = color
+        self.turn = turn
+        self.angle = start
+        self.offset = offset
+
+    def fire(self, x, y, target, bullets, rng):
+        vel_x, vel_y = velocities([self.angle + a for a in self.arms], self.speed)
+        bullets.spawn_volley(x + self.offset[0], y + self.offset[1], vel_x, vel_y, self.color)
+        self.angle = (self.angle + self.turn) % ANGLE_STEPS
+
+
+class AimedFan:
+    # count bullets spread over spread degrees, centred on the target
+    def __init__(self, count, spread, speed, color, offset=(0, 0)):
+        step = spread / (count - 1) if count > 1 else 0
+        self.fan = [round(i * step - spread / 2) for i in range(count)]
+        self.speed = speed
+        self.color = color
+        self.offset = offset
+
+    def fire(self, x, y, target, bullets, rng):
+        x += self.offset[0]
+        y += self.offset[1]
+        aim = heading(target.x - x, target.y - y)
+        vel_x, vel_y = velocities([aim + a for a in self.fan], self.speed)
+        bullets.spawn_volley(x, y, vel_x, vel_y, self.color)
+
+
+class Stream:
+    # One bullet per volley along a fixed heading
+    def __init__(self, angle, speed, color, offset=(0, 0)):
+        self.vel_x, self.vel_y = velocities([angle], speed)
+        self.color = color
+        self.offset = offset
+
+    def fire(self, x, y, target, bullets, rng):
+        bullets.spawn_volley(x + self.offset[0], y + self.offset[1], self.vel_x, self.vel_y, self.color)
+
+
+class Scatter:
+    # count exactly aimed shots at points jittered sideways around the target
+    def __init__(self, count, speed, color, jitter=50):
+        self.count = count
+        self.speed = speed
+        self.color = color
+        self.jitter = jitter
+
+    def fire(self, x, y, target, bullets, rng):
+        vel_x = []
+        vel_y = []
+        speed = self.speed
+        dy = target.y - y
+        for _ in range(self.count):
+            dx = target.x - x + rng.randint(-self.jitter, self.jitter)
+            distance = math.sqrt(dx*dx + dy*dy)
+            if distance > 0:
+                vel_x.append((dx / distance) * speed)
+                vel_y.append((dy / distance) * speed)
+        if vel_x:
+            bullets.spawn_volley(x, y, vel_x, vel_y, self.color)
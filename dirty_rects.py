@@ -0,0 +1,59 @@
+# Push only the screen regions that changed since the last frame
+from lazy_import import lazy_import
+
+pygame = lazy_import("pygame")
+
+# Above this fraction of the screen a single flip is cheaper than many rect uploads
+FULL_FLIP_RATIO = 0.4
+
+
+class DirtyRectTracker:
+    def __init__(self, screen_size, full_flip_ratio=FULL_FLIP_RATIO):
+        self.full_flip_area = screen_size[0] * screen_size[1] * full_flip_ratio
+        self.previous = []
+        self.current = []
+        self.hud = {}
+        self.full = True
+        self.full_flips = 0
+        self.partial_updates = 0
+
+    def add(self, rect):
+        if rect:
+            self.current.append(rect)
+
+    def extend(self, rects):
+        self.current.extend(rects)
+
+    def add_hud(self, slot, surface, rect):
+        # HUD text only becomes dirty when the cached surface for its slot changes;
+        # a None surface erases whatever the slot showed last
+        old = self.hud.get(slot)
+        if old is not None:
+            if old[0] is surface:
+                return
+            self.current.append(old[1])
+        if surface is None:
+            self.hud.pop(slot, None)
+        else:
+            self.current.append(rect)
+            self.hud[slot] = (surface, rect)
+
+    def invalidate(self):
+        self.full = True
+        self.hud.clear()
+
+    def present(self):
+        # Last frame's rects are pushed again so vacated pixels get erased
+        rects = self.previous + self.current
+        area = 0
+        for rect in rects:
+            area += rect.width * rect.height
+        if self.full or area > self.full_flip_area:
+            pygame.display.flip()
+            self.full_flips += 1
+        elif rects:
+            pygame.display.update(rects)
+            self.partial_updates += 1
+        self.full = False
+        self.previous = self.current
+        self.current = []
@@ -0,0 +1,220 @@
+# Struct-of-arrays storage for bullets and particles, backed by NumPy
+import numpy as np
+
+from lazy_import import lazy_import
+
+pygame = lazy_import("pygame")
+
+
+class EntityStore:
+    def __init__(self, radius, lifetime=0, capacity=256):
+        self.radius = radius
+        self.lifetime = lifetime
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vel_x = np.zeros(capacity)
+        self.vel_y = np.zeros(capacity)
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.color = np.zeros(capacity, dtype=np.uint16)
+        # Spawned since the last update(), so no motion has brought them to (x, y) yet
+        self.fresh = np.zeros(capacity, dtype=bool)
+        self.palette = []
+        self.palette_index = {}
+        self.sprites = []
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        capacity = len(self.x) * 2
+        for name in ("x", "y", "vel_x", "vel_y", "life", "color", "fresh"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def _color_index(self, color):
+        index = self.palette_index.get(color)
+        if index is None:
+            index = len(self.palette)
+            if index > 0xFFFF:
+                raise ValueError("EntityStore palette is limited to 65536 colours")
+            self.palette.append(color)
+            self.palette_index[color] = index
+            self.sprites.append(None)
+        return index
+
+    def spawn(self, x, y, vel_x, vel_y, color):
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.vel_x[i] = vel_x
+        self.vel_y[i] = vel_y
+        self.life[i] = self.lifetime
+        self.color[i] = self._color_index(color)
+        self.fresh[i] = True
+        self.count = i + 1
+
+    def spawn_volley(self, x, y, vel_x, vel_y, color):
+        # A whole volley lands with a single slice write per array; x and y may be
+        # one shared origin or per-bullet arrays
+        n = len(vel_x)
+        while self.count + n > len(self.x):
+            self._grow()
+        i = self.count
+        j = i + n
+        self.x[i:j] = x
+        self.y[i:j] = y
+        self.vel_x[i:j] = vel_x
+        self.vel_y[i:j] = vel_y
+        self.life[i:j] = self.lifetime
+        self.color[i:j] = self._color_index(color)
+        self.fresh[i:j] = True
+        self.count = j
+
+    def clear(self):
+        self.count = 0
+
+    def copy(self):
+        # Detached copy of the live entries for another thread to draw; sprites stay shared
+        clone = EntityStore.__new__(EntityStore)
+        clone.__dict__.update(self.__dict__)
+        n = self.count
+        for name in ("x", "y", "vel_x", "vel_y", "life", "color", "fresh"):
+            setattr(clone, name, getattr(self, name)[:n].copy())
+        clone.palette = list(self.palette)
+        return clone
+
+    def load(self, x, y, vel_x, vel_y, color, palette, life=None):
+        # Replace the contents with column buffers; color holds indices into palette
+        n = len(x)
+        while n > len(self.x):
+            self._grow()
+        self.count = n
+        if not n:
+            return
+        self.x[:n] = np.frombuffer(x, dtype=np.float64)
+        self.y[:n] = np.frombuffer(y, dtype=np.float64)
+        self.vel_x[:n] = np.frombuffer(vel_x, dtype=np.float64)
+        self.vel_y[:n] = np.frombuffer(vel_y, dtype=np.float64)
+        remap = np.array([self._color_index(c) for c in palette], dtype=np.uint16)
+        self.color[:n] = remap[np.frombuffer(color, dtype=np.uint16)]
+        self.fresh[:n] = False
+        self.life[:n] = np.frombuffer(life, dtype=np.int64) if life is not None else self.lifetime
+
+    def update(self):
+        n = self.count
+        self.x[:n] += self.vel_x[:n]
+        self.y[:n] += self.vel_y[:n]
+        self.fresh[:n] = False
+        if self.lifetime:
+            self.life[:n] -= 1
+            self.compact(self.life[:n] > 0)
+
+    def cull_outside(self, left, top, right, bottom):
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        self.compact((x >= left) & (x <= right) & (y >= top) & (y <= bottom))
+
+    def compact(self, keep):
+        # Fill the holes left by dropped entries with survivors from the tail
+        n = self.count
+        survivors = int(np.count_nonzero(keep))
+        if survivors == n:
+            return
+        holes = np.flatnonzero(~keep[:survivors])
+        movers = np.flatnonzero(keep[survivors:n]) + survivors
+        for array in (self.x, self.y, self.vel_x, self.vel_y, self.life, self.color, self.fresh):
+            array[holes] = array[movers]
+        self.count = survivors
+
+    def discard(self, indices):
+        # Swap-and-pop; descending order keeps pending indices valid
+        for i in sorted(indices, reverse=True):
+            last = self.count - 1
+            if i != last:
+                for array in (self.x, self.y, self.vel_x, self.vel_y, self.life, self.color, self.fresh):
+                    array[i] = array[last]
+            self.count = last
+
+    def drop_oldest(self, k):
+        # Oldest entries are the ones with the least lifetime left
+        n = self.count
+        if k >= n:
+            self.count = 0
+            return
+        keep = np.ones(n, dtype=bool)
+        keep[np.argpartition(self.life[:n], k - 1)[:k]] = False
+        self.compact(keep)
+
+    def points(self):
+        n = self.count
+        return list(zip(self.x[:n].tolist(), self.y[:n].tolist()))
+
+    def overlapping(self, x, y, radius):
+        n = self.count
+        dx = self.x[:n] - x
+        dy = self.y[:n] - y
+        reach = self.radius + radius
+        return np.flatnonzero(dx*dx + dy*dy < reach*reach).tolist()
+
+    def paths(self):
+        # (x, y, vel_x, vel_y) per entity; the last tick's motion ended at (x, y)
+        n = self.count
+        return list(zip(self.x[:n].tolist(), self.y[:n].tolist(),
+                        self.vel_x[:n].tolist(), self.vel_y[:n].tolist()))
+
+    def swept(self, x, y, radius):
+        # Swept-circle test of every entity's last tick of motion against a circle;
+        # returns (index, time of impact in [0, 1]) pairs. Fresh entities have not moved
+        # yet, so they get a point test at (x, y) and an impact time of 1
+        n = self.count
+        fresh = self.fresh[:n]
+        vx = np.where(fresh, 0.0, self.vel_x[:n])
+        vy = np.where(fresh, 0.0, self.vel_y[:n])
+        fx = self.x[:n] - vx - x
+        fy = self.y[:n] - vy - y
+        reach = self.radius + radius
+        a = vx*vx + vy*vy
+        b = fx*vx + fy*vy
+        c = fx*fx + fy*fy - reach*reach
+        disc = b*b - a*c
+        moving = (b < 0) & (disc >= 0)
+        t = np.ones(n) * 2
+        t[moving] = (-b[moving] - np.sqrt(disc[moving])) / a[moving]
+        t[c < 0] = 0
+        t[fresh & (c < 0)] = 1
+        hits = np.flatnonzero(t <= 1)
+        return list(zip(hits.tolist(), t[hits].tolist()))
+
+    def _sprite(self, index):
+        sprite = self.sprites[index]
+        if sprite is None:
+            size = self.radius * 2 + 1
+            sprite = pygame.Surface((size, size))
+            sprite.set_colorkey((0, 0, 0))
+            pygame.draw.circle(sprite, self.palette[index], (self.radius, self.radius), self.radius)
+            self.sprites[index] = sprite
+        return sprite
+
+    def draw(self, screen, dirty=None, alpha=1.0):
+        # alpha < 1 draws between the previous tick's position (x - vel) and the current one
+        n = self.count
+        if not n:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        if alpha < 1:
+            x = x - self.vel_x[:n] * (1 - alpha)
+            y = y - self.vel_y[:n] * (1 - alpha)
+        xs = (x.astype(np.int32) - self.radius).tolist()
+        ys = (y.astype(np.int32) - self.radius).tolist()
+        sprites = [self._sprite(i) for i in range(len(self.palette))]
+        colors = self.color[:n].tolist()
+        rects = screen.blits([(sprites[c], (x, y)) for c, x, y in zip(colors, xs, ys)], dirty is not None)
+        if dirty is not None:
+            dirty.extend(rects)
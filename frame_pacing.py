@@ -0,0 +1,112 @@
+# Frame pacing: simulation tick and presented-frame intervals, single-threaded vs threaded,
+# with optional stalls injected into display.flip to mimic a slow compositor or vsync wait
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _intervals(stamps):
+    return [(b - a) * 1000 for a, b in zip(stamps, stamps[1:])]
+
+
+def measure(threaded, seconds, stall_ms, stall_every, flip_ms, vectorized, seed):
+    # Saves go to a throwaway directory, so a measurement leaves nothing behind
+    with tempfile.TemporaryDirectory() as data_dir:
+        return _measure(threaded, seconds, stall_ms, stall_every, flip_ms, vectorized, seed, data_dir)
+
+
+def _measure(threaded, seconds, stall_ms, stall_every, flip_ms, vectorized, seed, data_dir):
+    import space_explorer as se
+    pygame = se.pygame
+    game = se.Game(vectorized=vectorized, seed=seed, threaded=threaded, data_dir=data_dir)
+    # The player cannot die, so every run measures the same amount of play
+    for player in game.sim.players:
+        player.health = player.max_health = 10 ** 6
+
+    ticks = []
+    frames = []
+    update = game.update
+    flip = pygame.display.flip
+    deadline = time.perf_counter() + seconds
+
+    def timed_update(controls=None):
+        update(controls)
+        ticks.append(time.perf_counter())
+
+    def slow_flip():
+        flip()
+        stall = flip_ms
+        if stall_every and len(frames) % stall_every == stall_every - 1:
+            stall += stall_ms
+        if stall:
+            time.sleep(stall / 1000)
+        now = time.perf_counter()
+        frames.append(now)
+        if now >= deadline:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    game.update = timed_update
+    pygame.display.flip = slow_flip
+    try:
+        game.run()
+    finally:
+        pygame.display.flip = flip
+
+    tick_ms = se.TICK_SECONDS * 1000
+    tick_gaps = _intervals(ticks)
+    frame_gaps = _intervals(frames)
+    return {
+        "ticks": len(ticks),
+        "tick_p50_ms": statistics.median(tick_gaps),
+        "tick_p99_ms": _percentile(tick_gaps, 0.99),
+        "tick_max_ms": max(tick_gaps),
+        # Late ticks arrive well after their slot; catch-up ticks run back to back behind them
+        "late_ticks_pct": 100 * sum(gap > tick_ms * 1.5 for gap in tick_gaps) / len(tick_gaps),
+        "catch_up_ticks_pct": 100 * sum(gap < tick_ms * 0.25 for gap in tick_gaps) / len(tick_gaps),
+        "frames": len(frames),
+        "frame_p50_ms": statistics.median(frame_gaps),
+        "frame_p99_ms": _percentile(frame_gaps, 0.99),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare frame pacing of the single-threaded and threaded loops")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--stall-ms", type=float, default=30.0, help="extra time spent in an occasional flip")
+    parser.add_argument("--stall-every", type=int, default=20, help="frames between stalls (0 disables)")
+    parser.add_argument("--flip-ms", type=float, default=0.0, help="time spent in every flip")
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--headless", action="store_true", help="use the SDL dummy video driver")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+    if args.headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    report = {}
+    for name, threaded in (("single", False), ("threaded", True)):
+        report[name] = measure(threaded, args.seconds, args.stall_ms, args.stall_every, args.flip_ms,
+                               args.vectorized, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{args.seconds:g}s per mode, {args.stall_ms:g} ms stall every {args.stall_every} flips, "
+              f"{args.flip_ms:g} ms per flip")
+        print(f"  {'':<20} {'single':>10} {'threaded':>10}")
+        for key in report["single"]:
+            print(f"  {key:<20} {report['single'][key]:10.1f} {report['threaded'][key]:10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,694 @@
+# Authoritative-server co-op over UDP: clients send input bitmasks, the server runs the
+# Simulation and streams quantized state, delta-compressed against each client's last ack
+import argparse
+import asyncio
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+import space_explorer as se
+from waves import load_campaign
+
+DEFAULT_PORT = 5999
+# Message types, the first byte of every datagram
+JOIN = 1
+WELCOME = 2
+INPUT = 3
+STATE = 4
+BYE = 5
+KIND = struct.Struct("<B")
+# slot, player count, seed; followed by the campaign's archetype names
+WELCOME_HEAD = struct.Struct("<BBBQ")
+NAME = struct.Struct("<B")
+# newest input seq, last state tick received, inputs carried (oldest first)
+INPUT_HEAD = struct.Struct("<BIIB")
+# tick, base tick (0 means a full state), last input seq applied for this client, then the
+# explosions since the base tick and the zlib compressed Frame
+STATE_HEAD = struct.Struct("<BIII")
+EVENT_COUNT = struct.Struct("<H")
+# tick, x, y (quarter pixels), colour, particle count
+EXPLOSION = struct.Struct("<Ihh3BB")
+# wave, kills, score, high score, boss present, boss x, y, health, max health, phase
+GLOBALS = struct.Struct("<HIII?hhhhB")
+# players, enemies, powerups, player bullets, enemy bullets
+COUNTS = struct.Struct("<5H")
+# palette size, then an RGB triple per colour
+PALETTE = struct.Struct("<H")
+
+# Positions and velocities travel as int16 quarter pixels
+SCALE = 4
+POWER_TYPES = ("health", "shield", "weapon", "score")
+SECTION_COLUMNS = (5, 5, 3, 5, 5)
+# Column indices of the two bullet sections (x, y, vel_x, vel_y, color)
+PROJECTILE_COLUMNS = (13, 18)
+# Recent inputs repeated in every INPUT datagram, so one lost packet loses no input
+INPUT_REDUNDANCY = 4
+# Inputs a client may run ahead of the server before the oldest are dropped
+MAX_INPUT_QUEUE = 8
+# Sent states kept as delta bases; an ack older than this gets a full state
+HISTORY = 64
+# Ticks a particle lives; aging stops there, as every particle is gone by then
+PARTICLE_LIFETIME = 30
+JOIN_RETRY = 0.5
+# Seconds a client keeps asking to join before giving up
+CONNECT_TIMEOUT = 10.0
+# BYE is repeated, since a lost one would leave a client waiting on a finished session
+BYE_REPEAT = 3
+
+
+def _quantize(values):
+    return np.clip(np.rint(np.asarray(values, dtype=np.float64) * SCALE), -32768, 32767).astype(np.int16)
+
+
+def _int16(values):
+    return np.clip(np.asarray(values, dtype=np.int64), -32768, 32767).astype(np.int16)
+
+
+def _colors(values):
+    # Palette indices keep their uint16 bit pattern in the int16 columns
+    return np.asarray(values, dtype=np.uint16).view(np.int16)
+
+
+class Frame:
+    # One tick of quantized state: a small raw head plus int16 columns that are delta coded
+    def __init__(self, tick, head, columns):
+        self.tick = tick
+        self.head = head
+        self.columns = columns
+
+    def predicted(self, tick):
+        # The columns extrapolated to a later tick: bullets fly straight, the rest holds still
+        columns = list(self.columns)
+        elapsed = tick - self.tick
+        for i in PROJECTILE_COLUMNS:
+            columns[i] = columns[i] + columns[i + 2] * elapsed
+            columns[i + 1] = columns[i + 1] + columns[i + 3] * elapsed
+        return columns
+
+    def encode(self, base=None):
+        # Each column is sent as its difference from the base's prediction of it; int16
+        # wraparound makes that exact, and bullets that kept their slot and heading
+        # come out as near-zero runs for zlib
+        parts = [self.head]
+        previous_columns = base.predicted(self.tick) if base is not None else None
+        for i, column in enumerate(self.columns):
+            if previous_columns is not None:
+                previous = previous_columns[i]
+                shared = min(len(column), len(previous))
+                column = column.copy()
+                column[:shared] -= previous[:shared]
+            parts.append(column.tobytes())
+        return zlib.compress(b"".join(parts), 6)
+
+    @classmethod
+    def decode(cls, tick, data, base=None):
+        raw = zlib.decompress(data)
+        offset = GLOBALS.size
+        counts = COUNTS.unpack_from(raw, offset)
+        offset += COUNTS.size
+        palette_size = PALETTE.unpack_from(raw, offset)[0]
+        offset += PALETTE.size + palette_size * 3
+        head = raw[:offset]
+        columns = []
+        previous_columns = base.predicted(tick) if base is not None else None
+        for count, width in zip(counts, SECTION_COLUMNS):
+            for _ in range(width):
+                column = np.frombuffer(raw, np.int16, count, offset).copy()
+                offset += count * 2
+                if previous_columns is not None:
+                    previous = previous_columns[len(columns)]
+                    shared = min(count, len(previous))
+                    column[:shared] += previous[:shared]
+                columns.append(column)
+        return cls(tick, head, columns)
+
+
+class StateEncoder:
+    # Server side: Simulation -> Frame. Particles are not sent; clients spawn their own from
+    # the explosion events that travel alongside each Frame
+    def __init__(self, sim):
+        self.sim = sim
+        self.kinds = {name: i for i, name in enumerate(sorted(sim.campaign.archetypes))}
+        self.power_kinds = {name: i for i, name in enumerate(POWER_TYPES)}
+        # Append-only, so colour indices stay stable from tick to tick
+        self.palette = []
+        self.palette_index = {}
+
+    def color(self, color):
+        index = self.palette_index.get(color)
+        if index is None:
+            index = self.palette_index[color] = len(self.palette)
+            self.palette.append(color)
+        return index
+
+    def projectile_columns(self, container):
+        if hasattr(container, "palette"):
+            n = container.count
+            remap = _colors([self.color(c) for c in container.palette] or [0])
+            return [_quantize(container.x[:n]), _quantize(container.y[:n]),
+                    _quantize(container.vel_x[:n]), _quantize(container.vel_y[:n]),
+                    remap[container.color[:n]]]
+        return [_quantize([b.x for b in container]), _quantize([b.y for b in container]),
+                _quantize([b.vel_x for b in container]), _quantize([b.vel_y for b in container]),
+                _colors([self.color(b.color) for b in container])]
+
+    def enemy_columns(self, enemies):
+        if hasattr(enemies, "archetypes"):
+            n = enemies.count
+            remap = np.array([self.kinds[a.name] for a in enemies.archetypes] or [0], dtype=np.int64)
+            return [_quantize(enemies.x[:n]), _quantize(enemies.y[:n]), _int16(remap[enemies.code[:n]]),
+                    _int16(enemies.health[:n]), _int16(enemies.max_health[:n])]
+        return [_quantize([e.x for e in enemies]), _quantize([e.y for e in enemies]),
+                _int16([self.kinds[e.enemy_type] for e in enemies]),
+                _int16([e.health for e in enemies]), _int16([e.max_health for e in enemies])]
+
+    def frame(self):
+        sim = self.sim
+        players = sim.players
+        enemies = sim.enemies
+        powerups = sim.powerups
+        columns = [_quantize([p.x for p in players]), _quantize([p.y for p in players]),
+                   _int16([p.health for p in players]), _int16([p.shield for p in players]),
+                   _int16([p.power_level for p in players])]
+        columns += self.enemy_columns(enemies)
+        columns += [_quantize([u.x for u in powerups]), _quantize([u.y for u in powerups]),
+                    _int16([self.power_kinds[u.power_type] for u in powerups])]
+        columns += self.projectile_columns(sim.bullets)
+        columns += self.projectile_columns(sim.enemy_bullets)
+
+        boss = sim.boss
+        if boss:
+            boss_state = (True, round(boss.x * SCALE), round(boss.y * SCALE), boss.health,
+                          boss.max_health, boss.phase)
+        else:
+            boss_state = (False, 0, 0, 0, 0, 0)
+        head = [GLOBALS.pack(sim.wave, sim.enemies_killed, sim.player.score, sim.high_score, *boss_state),
+                COUNTS.pack(len(players), len(enemies), len(powerups), len(sim.bullets), len(sim.enemy_bullets)),
+                PALETTE.pack(len(self.palette)), bytes(c for color in self.palette for c in color)]
+        return Frame(sim.tick, b"".join(head), columns)
+
+
+def apply_frame(sim, frame, names, archetypes):
+    # Client side: rebuild a Simulation from a Frame so Game.draw can render it unchanged
+    (wave, kills, score, high_score, boss_present, boss_x, boss_y, boss_health, boss_max,
+     boss_phase) = GLOBALS.unpack_from(frame.head)
+    # The column lengths already carry the counts, so COUNTS is skipped
+    flat = frame.head[GLOBALS.size + COUNTS.size + PALETTE.size:]
+    palette = [tuple(flat[i:i + 3]) for i in range(0, len(flat), 3)]
+    columns = [c.tolist() for c in frame.columns[:13]]
+    player_cols, enemy_cols, powerup_cols = columns[0:5], columns[5:10], columns[10:13]
+
+    sim.tick = frame.tick
+    sim.wave = wave
+    sim.enemies_killed = kills
+    sim.high_score = max(sim.high_score, high_score)
+    for player, x, y, health, shield, power in zip(sim.players, *player_cols):
+        player.x = x / SCALE
+        player.y = y / SCALE
+        player.health = health
+        player.shield = shield
+        player.power_level = power
+    sim.player.score = score
+
+    # Built without __init__, which would roll speeds and cooldowns the client never uses
+    if hasattr(sim.enemies, "archetypes"):
+        x, y, kind, health, max_health = enemy_cols
+        unused = [0] * len(x)
+        sim.enemies.load([v / SCALE for v in x], [v / SCALE for v in y], unused, health, max_health,
+                         unused, [archetypes[names[k]] for k in kind])
+    else:
+        enemies = []
+        for x, y, kind, health, max_health in zip(*enemy_cols):
+            archetype = archetypes[names[kind]]
+            e = se.Enemy.__new__(se.Enemy)
+            e.x = x / SCALE
+            e.y = y / SCALE
+            e.enemy_type = archetype.name
+            e.archetype = archetype
+            e.radius = archetype.radius
+            e.color = archetype.color
+            e.health = health
+            e.max_health = max_health
+            enemies.append(e)
+        sim.enemies = enemies
+    sim.powerups = [se.PowerUp(x / SCALE, y / SCALE, POWER_TYPES[kind]) for x, y, kind in zip(*powerup_cols)]
+
+    if boss_present:
+        if sim.boss is None:
+            sim.boss = se.Boss(0, 0)
+        sim.boss.x = boss_x / SCALE
+        sim.boss.y = boss_y / SCALE
+        sim.boss.health = boss_health
+        sim.boss.max_health = boss_max
+        sim.boss.phase = boss_phase
+    else:
+        sim.boss = None
+
+    for container, offset in zip((sim.bullets, sim.enemy_bullets), PROJECTILE_COLUMNS):
+        x, y, vel_x, vel_y, color = frame.columns[offset:offset + 5]
+        if hasattr(container, "palette"):
+            container.load(x / SCALE, y / SCALE, vel_x / SCALE, vel_y / SCALE, color, palette)
+            continue
+        container.clear()
+        spawn = container.spawn
+        for px, py, vx, vy, c in zip((x / SCALE).tolist(), (y / SCALE).tolist(), (vel_x / SCALE).tolist(),
+                                     (vel_y / SCALE).tolist(), color.view(np.uint16).tolist()):
+            spawn(px, py, vx, vy, palette[c])
+
+
+class NetStats:
+    # Byte and packet counters with one-second rates, plus a smoothed round-trip time
+    def __init__(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.packets_in = 0
+        self.packets_out = 0
+        self.rtt = None
+        self.rate_in = 0.0
+        self.rate_out = 0.0
+        self.window_start = time.perf_counter()
+        self.window_in = 0
+        self.window_out = 0
+
+    def received(self, size):
+        self.bytes_in += size
+        self.packets_in += 1
+        self.window_in += size
+
+    def sent(self, size):
+        self.bytes_out += size
+        self.packets_out += 1
+        self.window_out += size
+
+    def sample_rtt(self, seconds):
+        self.rtt = seconds if self.rtt is None else self.rtt * 0.9 + seconds * 0.1
+
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        elapsed = now - self.window_start
+        if elapsed >= 1.0:
+            self.rate_in = self.window_in / elapsed
+            self.rate_out = self.window_out / elapsed
+            self.window_start = now
+            self.window_in = 0
+            self.window_out = 0
+
+    def lines(self):
+        average = self.bytes_in / self.packets_in if self.packets_in else 0
+        rtt = f"{self.rtt * 1000:.1f} ms" if self.rtt is not None else "-"
+        return [f"Net in: {self.rate_in / 1024:.1f} KB/s ({average:.0f} B/packet)",
+                f"Net out: {self.rate_out / 1024:.1f} KB/s",
+                f"RTT: {rtt}"]
+
+
+class _Remote:
+    def __init__(self, slot, addr):
+        self.slot = slot
+        self.addr = addr
+        self.inputs = deque()
+        self.received = 0
+        self.applied = 0
+        self.bits = 0
+        self.acked = 0
+
+
+class NetServer(asyncio.DatagramProtocol):
+    def __init__(self, players=2, seed=None, vectorized=False, campaign=None):
+        self.sim = se.Simulation(vectorized, seed=seed, players=players,
+                                 campaign=load_campaign(campaign) if campaign else None)
+        self.encoder = StateEncoder(self.sim)
+        self.names = sorted(self.sim.campaign.archetypes)
+        self.remotes = {}
+        self.history = {}
+        self.explosions = {}
+        self.sim.explosion_log = []
+        self.stats = NetStats()
+        self.full_bytes = 0
+        self.frames = 0
+        self.transport = None
+        self.ready = asyncio.Event()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def send(self, data, addr):
+        self.transport.sendto(data, addr)
+        self.stats.sent(len(data))
+
+    def welcome(self, remote):
+        names = b"".join(NAME.pack(len(n)) + n for n in (name.encode() for name in self.names))
+        self.send(WELCOME_HEAD.pack(WELCOME, remote.slot, self.sim.player_count, self.sim.seed) + names,
+                  remote.addr)
+
+    def datagram_received(self, data, addr):
+        self.stats.received(len(data))
+        if not data:
+            return
+        kind = data[0]
+        remote = self.remotes.get(addr)
+        if kind == JOIN:
+            if remote is None:
+                if len(self.remotes) == self.sim.player_count:
+                    # Full: turned away, so the client can report it instead of retrying
+                    self.send(KIND.pack(BYE), addr)
+                    return
+                remote = self.remotes[addr] = _Remote(len(self.remotes), addr)
+                if len(self.remotes) == self.sim.player_count:
+                    self.ready.set()
+            # Resent on every JOIN, since the first WELCOME may have been lost
+            self.welcome(remote)
+        elif kind == INPUT and remote and len(data) >= INPUT_HEAD.size:
+            _, seq, ack, count = INPUT_HEAD.unpack_from(data)
+            remote.acked = max(remote.acked, ack)
+            first = seq - count + 1
+            for i, bits in enumerate(data[INPUT_HEAD.size:INPUT_HEAD.size + count]):
+                if first + i > remote.received:
+                    remote.inputs.append((first + i, bits))
+                    remote.received = first + i
+            while len(remote.inputs) > MAX_INPUT_QUEUE:
+                remote.inputs.popleft()
+        elif kind == BYE and remote:
+            remote.inputs.clear()
+            remote.bits = 0
+
+    def step(self):
+        # One queued input per player per tick; a player with none queued repeats the last
+        controls = [se.IDLE_INPUT] * self.sim.player_count
+        for remote in self.remotes.values():
+            if remote.inputs:
+                remote.applied, remote.bits = remote.inputs.popleft()
+            controls[remote.slot] = se.InputState.from_bits(remote.bits)
+        self.sim.update(controls)
+
+        frame = self.encoder.frame()
+        tick = frame.tick
+        self.history[tick] = frame
+        self.history.pop(tick - HISTORY, None)
+        log = self.sim.explosion_log
+        self.explosions[tick] = [EXPLOSION.pack(tick, round(x * SCALE), round(y * SCALE), *color, count)
+                                 for x, y, color, count in log]
+        self.explosions.pop(tick - HISTORY, None)
+        log.clear()
+        self.frames += 1
+        full = None
+        for remote in self.remotes.values():
+            base = self.history.get(remote.acked)
+            if base is None:
+                full = full or frame.encode()
+                payload = full
+            else:
+                payload = frame.encode(base)
+            # Every explosion the client may not have seen yet, so a lost state loses none
+            events = [e for t in range(base.tick + 1 if base else tick, tick + 1) for e in self.explosions[t]]
+            self.send(b"".join([STATE_HEAD.pack(STATE, tick, base.tick if base else 0, remote.applied),
+                                EVENT_COUNT.pack(len(events))] + events + [payload]), remote.addr)
+        if self.frames % 60 == 0:
+            # Sampled: what a full state would cost, to compare against the deltas sent
+            self.full_bytes += len(full or frame.encode()) * 60
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, max_ticks=None):
+        loop = asyncio.get_running_loop()
+        await loop.create_datagram_endpoint(lambda: self, local_addr=(host, port))
+        try:
+            await self.ready.wait()
+            next_tick = loop.time()
+            while not self.sim.game_over and (max_ticks is None or self.sim.tick < max_ticks):
+                self.step()
+                next_tick += se.TICK_SECONDS
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            for _ in range(BYE_REPEAT):
+                for remote in self.remotes.values():
+                    self.send(KIND.pack(BYE), remote.addr)
+        finally:
+            self.transport.close()
+
+    def report(self):
+        sent = self.stats.bytes_out
+        packets = max(1, self.stats.packets_out)
+        return {"ticks": self.sim.tick, "clients": len(self.remotes),
+                "bytes_out": sent, "bytes_per_packet": sent / packets,
+                "full_state_bytes_per_packet": self.full_bytes / max(1, self.frames),
+                "bytes_in": self.stats.bytes_in}
+
+
+class NetClient(asyncio.DatagramProtocol):
+    def __init__(self, campaign=None):
+        self.archetypes = (load_campaign(campaign) if campaign else se.default_campaign()).archetypes
+        self.stats = NetStats()
+        self.transport = None
+        self.welcomed = asyncio.Event()
+        self.refused = False
+        # ended: the server finished the session; closed: this client has shut its socket
+        self.ended = False
+        self.closed = False
+        self.slot = None
+        self.players = None
+        self.seed = None
+        self.names = []
+        self.sim = None
+        self.frames = {}
+        self.latest = 0
+        self.seq = 0
+        self.pending = deque()
+        self.sent_at = {}
+        self.acked_input = 0
+        self.corrections = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.closed = True
+
+    def send(self, data):
+        self.transport.sendto(data)
+        self.stats.sent(len(data))
+
+    def datagram_received(self, data, addr):
+        self.stats.received(len(data))
+        if not data:
+            return
+        kind = data[0]
+        if kind == WELCOME and not self.welcomed.is_set() and len(data) >= WELCOME_HEAD.size:
+            _, self.slot, self.players, self.seed = WELCOME_HEAD.unpack_from(data)
+            offset = WELCOME_HEAD.size
+            names = []
+            while offset < len(data):
+                size = data[offset]
+                names.append(data[offset + 1:offset + 1 + size].decode())
+                offset += 1 + size
+            self.names = names
+            self.welcomed.set()
+        elif kind == STATE and self.sim is not None and len(data) >= STATE_HEAD.size + EVENT_COUNT.size:
+            try:
+                self.receive_state(data)
+            except (zlib.error, struct.error, ValueError, IndexError):
+                pass  # Corrupt; the next state is coded against the last good ack
+        elif kind == BYE:
+            if self.welcomed.is_set():
+                self.ended = True
+            else:
+                self.refused = True
+                self.welcomed.set()
+
+    async def connect(self, host="127.0.0.1", port=DEFAULT_PORT, timeout=CONNECT_TIMEOUT):
+        loop = asyncio.get_running_loop()
+        await loop.create_datagram_endpoint(lambda: self, remote_addr=(host, port))
+        deadline = loop.time() + timeout
+        while not self.welcomed.is_set():
+            if loop.time() >= deadline:
+                self.close()
+                raise TimeoutError(f"No answer from {host}:{port} after {timeout:g}s")
+            self.send(KIND.pack(JOIN))
+            try:
+                await asyncio.wait_for(self.welcomed.wait(), JOIN_RETRY)
+            except asyncio.TimeoutError:
+                pass
+        if self.refused:
+            self.close()
+            raise ConnectionRefusedError(f"Server {host}:{port} is full")
+        missing = [name for name in self.names if name not in self.archetypes]
+        if missing:
+            self.close()
+            raise ValueError(f"Server campaign uses unknown archetypes {missing}; pass its --campaign")
+
+    def attach(self, sim):
+        # The Simulation that received states are written into, usually a Game's
+        self.sim = sim
+
+    @property
+    def started(self):
+        return self.latest > 0
+
+    def receive_state(self, data):
+        _, tick, base_tick, applied = STATE_HEAD.unpack_from(data)
+        if tick <= self.latest:
+            return  # Late or duplicated; a newer state has already been applied
+        base = None
+        if base_tick:
+            base = self.frames.get(base_tick)
+            if base is None:
+                return
+        offset = STATE_HEAD.size
+        count = EVENT_COUNT.unpack_from(data, offset)[0]
+        offset += EVENT_COUNT.size
+        explosions = [EXPLOSION.unpack_from(data, offset + i * EXPLOSION.size) for i in range(count)]
+        frame = Frame.decode(tick, data[offset + count * EXPLOSION.size:], base)
+        self.frames[tick] = frame
+        for old in [t for t in self.frames if t < tick - HISTORY]:
+            del self.frames[old]
+        previous = self.latest
+        self.latest = tick
+
+        if applied > self.acked_input:
+            sent = self.sent_at.pop(applied, None)
+            if sent is not None:
+                self.stats.sample_rtt(time.perf_counter() - sent)
+            for seq in [s for s in self.sent_at if s < applied]:
+                del self.sent_at[seq]
+            self.acked_input = applied
+        while self.pending and self.pending[0][0] <= applied:
+            self.pending.popleft()
+
+        local = self.sim.players[self.slot]
+        predicted = (local.x, local.y)
+        apply_frame(self.sim, frame, self.names, self.archetypes)
+        # Particles run locally: age them by the ticks that passed, then add the new explosions
+        sim = self.sim
+        for _ in range(min(tick - previous, PARTICLE_LIFETIME) if previous else 0):
+            sim.update_particles()
+        for event_tick, x, y, r, g, b, particles in explosions:
+            if event_tick > previous:
+                sim.create_explosion(x / SCALE, y / SCALE, (r, g, b), particles)
+        # Prediction: replay the inputs the server has not applied yet on top of its state
+        if local.health > 0:
+            for _, bits in self.pending:
+                local.update(se.InputState.from_bits(bits))
+        if (local.x, local.y) != predicted:
+            self.corrections += 1
+
+    def send_input(self, controls):
+        # Applied to the local ship at once, then sent with the last few inputs for redundancy
+        if self.ended:
+            return
+        self.seq += 1
+        bits = controls.to_bits()
+        self.pending.append((self.seq, bits))
+        self.sent_at[self.seq] = time.perf_counter()
+        local = self.sim.players[self.slot]
+        if local.health > 0:
+            local.update(controls)
+        recent = [b for _, b in list(self.pending)[-INPUT_REDUNDANCY:]]
+        self.send(INPUT_HEAD.pack(INPUT, self.seq, self.latest, len(recent)) + bytes(recent))
+        self.stats.tick()
+
+    def close(self):
+        if self.transport and not self.transport.is_closing():
+            self.send(KIND.pack(BYE))
+            self.transport.close()
+        self.closed = True
+
+
+def bot_controls(tick, slot):
+    # Headless stand-in for a player: sweep side to side while firing
+    phase = (tick + slot * 45) % 180
+    return se.InputState(left=phase < 90, right=phase >= 90, shoot=True)
+
+
+async def run_bot(host, port, campaign=None, max_ticks=None):
+    client = NetClient(campaign)
+    await client.connect(host, port)
+    client.attach(se.Simulation(seed=client.seed, players=client.players,
+                                campaign=load_campaign(campaign) if campaign else None))
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
+    ticks = 0
+    while not client.ended and not client.closed and (max_ticks is None or ticks < max_ticks):
+        if client.started:
+            client.send_input(bot_controls(ticks, client.slot))
+            ticks += 1
+        next_tick += se.TICK_SECONDS
+        await asyncio.sleep(max(0.0, next_tick - loop.time()))
+    client.close()
+    return client
+
+
+async def run_client(host, port, campaign=None, player="default"):
+    client = NetClient(campaign)
+    await client.connect(host, port)
+    game = se.Game(player=player, campaign=campaign, players=client.players)
+    game.player_index = client.slot
+    client.attach(game.sim)
+    pygame = se.pygame
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
+    running = True
+    try:
+        # The window stays up on the last state after the session ends, until ESC (or R on
+        # the game over screen, as there is no restarting a network session)
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_r and client.ended:
+                    running = False
+            if client.started and not client.ended:
+                client.send_input(se.InputState.from_keys(pygame.key.get_pressed()))
+            game.status_lines = client.stats.lines()
+            if client.ended:
+                game.status_lines.append("Session ended - ESC to quit")
+            if client.started and game.sim.game_over:
+                game.game_over_screen()
+            else:
+                game.draw()
+            next_tick += se.TICK_SECONDS
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+    finally:
+        client.close()
+        game.store.close()
+        pygame.quit()
+    return client
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Space Explorer networked co-op")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    server = sub.add_parser("server", help="run the authoritative simulation")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=DEFAULT_PORT)
+    server.add_argument("--players", type=int, default=2, help="clients to wait for before starting")
+    server.add_argument("--seed", type=se.seed_arg)
+    server.add_argument("--vectorized", action="store_true")
+    server.add_argument("--campaign", metavar="PATH")
+    server.add_argument("--ticks", type=int, help="stop after this many ticks")
+    client = sub.add_parser("client", help="join a server")
+    client.add_argument("--host", default="127.0.0.1")
+    client.add_argument("--port", type=int, default=DEFAULT_PORT)
+    client.add_argument("--campaign", metavar="PATH", help="must match the server's")
+    client.add_argument("--player", default="default")
+    client.add_argument("--bot", action="store_true", help="play headless with a scripted bot")
+    client.add_argument("--ticks", type=int, help="with --bot, leave after this many ticks")
+    args = parser.parse_args(argv)
+
+    if args.mode == "server":
+        net = NetServer(args.players, args.seed, args.vectorized, args.campaign)
+        print(f"waiting for {args.players} players on {args.host}:{args.port}")
+        asyncio.run(net.serve(args.host, args.port, args.ticks))
+        for key, value in net.report().items():
+            print(f"  {key:<28} {value:12.1f}" if isinstance(value, float) else f"  {key:<28} {value:12}")
+    elif args.bot:
+        net = asyncio.run(run_bot(args.host, args.port, args.campaign, args.ticks))
+        print(f"slot {net.slot}: " + "; ".join(net.stats.lines()) + f"; {net.corrections} corrections")
+    else:
+        asyncio.run(run_client(args.host, args.port, args.campaign, args.player))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# Crash-safe saves written off the game thread: per-profile leaderboards and a run history log
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+
+DATA_DIR = "saves"
+LEADERBOARD_SIZE = 10
+HISTORY_FILE = "run_history.jsonl"
+LEGACY_HIGH_SCORE_FILE = "high_score.json"
+
+
+def atomic_write_json(path, data):
+    # Write a sibling temp file, fsync it, then rename over the target in one step
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _safe_name(profile):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in profile) or "default"
+
+
+class PersistenceService:
+    def __init__(self, profile="default", data_dir=DATA_DIR, leaderboard_size=LEADERBOARD_SIZE):
+        self.profile = profile
+        self.data_dir = data_dir
+        self.leaderboard_size = leaderboard_size
+        self.leaderboard_path = os.path.join(data_dir, f"leaderboard_{_safe_name(profile)}.json")
+        self.history_path = os.path.join(data_dir, HISTORY_FILE)
+        os.makedirs(data_dir, exist_ok=True)
+        self.runs = self._load_leaderboard()
+        self.legacy_high_score = self._load_legacy_high_score()
+
+        self.tasks = queue.Queue()
+        self.thread = threading.Thread(target=self._worker, name="persistence", daemon=True)
+        self.thread.start()
+
+    def _load_leaderboard(self):
+        try:
+            with open(self.leaderboard_path) as f:
+                return json.load(f).get("runs", [])
+        except (FileNotFoundError, ValueError):
+            return []
+
+    def _load_legacy_high_score(self):
+        try:
+            with open(LEGACY_HIGH_SCORE_FILE) as f:
+                return json.load(f).get("high_score", 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _worker(self):
+        while True:
+            task = self.tasks.get()
+            try:
+                if task is None:
+                    return
+                task()
+            except OSError as e:
+                print(f"persistence: {e}", file=sys.stderr)
+            except Exception as e:
+                # Anything else (say a run that json cannot encode) must not kill the worker,
+                # or the next flush() or close() would wait forever on tasks nobody runs
+                print(f"persistence: {type(e).__name__}: {e}", file=sys.stderr)
+            finally:
+                self.tasks.task_done()
+
+    def high_score(self):
+        best = self.runs[0]["score"] if self.runs else 0
+        return max(best, self.legacy_high_score)
+
+    def leaderboard(self):
+        return list(self.runs)
+
+    def record_run(self, run):
+        # Updates the in-memory board immediately; the disk writes happen on the worker
+        run = dict(run, profile=self.profile)
+        self.runs.append(run)
+        self.runs.sort(key=lambda r: r["score"], reverse=True)
+        del self.runs[self.leaderboard_size:]
+        snapshot = {"profile": self.profile, "runs": list(self.runs)}
+        line = json.dumps(run) + "\n"
+        self.tasks.put(lambda: atomic_write_json(self.leaderboard_path, snapshot))
+        self.tasks.put(lambda: self._append_history(line))
+
+    def _append_history(self, line):
+        with open(self.history_path, "a") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def query_history(self, profile=None, min_score=None, min_wave=None, since=None, limit=None):
+        # Newest first; a torn final line from a crash is skipped
+        self.flush()
+        runs = []
+        try:
+            with open(self.history_path) as f:
+                for line in f:
+                    try:
+                        run = json.loads(line)
+                    except ValueError:
+                        continue
+                    if profile is not None and run.get("profile") != profile:
+                        continue
+                    if min_score is not None and run.get("score", 0) < min_score:
+                        continue
+                    if min_wave is not None and run.get("wave", 0) < min_wave:
+                        continue
+                    if since is not None and run.get("finished_at", 0) < since:
+                        continue
+                    runs.append(run)
+        except FileNotFoundError:
+            return []
+        runs.reverse()
+        return runs[:limit] if limit is not None else runs
+
+    def flush(self):
+        self.tasks.join()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.tasks.put(None)
+            self.thread.join()
@@ -0,0 +1,73 @@
+# Free-list object pools so bullets and particles are recycled instead of reallocated
+
+
+class Pool:
+    def __init__(self, factory):
+        self.factory = factory
+        self.free = []
+        self.live = 0
+        self.high_water = 0
+        self.allocations = 0
+        self.reuses = 0
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            self.reuses += 1
+        else:
+            obj = self.factory(*args)
+            self.allocations += 1
+        self.live += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        return obj
+
+    def release(self, obj):
+        self.live -= 1
+        self.free.append(obj)
+
+    def stats(self):
+        return {
+            "live": self.live,
+            "free": len(self.free),
+            "high_water": self.high_water,
+            "allocations": self.allocations,
+            "reuses": self.reuses,
+        }
+
+
+class PooledList(list):
+    # Unordered entity list whose members come from, and go back to, a Pool
+    def __init__(self, pool):
+        super().__init__()
+        self.pool = pool
+
+    def spawn(self, *args):
+        obj = self.pool.acquire(*args)
+        self.append(obj)
+        return obj
+
+    def spawn_volley(self, x, y, vel_x, vel_y, color):
+        acquire = self.pool.acquire
+        self.extend([acquire(x, y, vx, vy, color) for vx, vy in zip(vel_x, vel_y)])
+
+    def swap_remove(self, index):
+        last = self.pop()
+        if index < len(self):
+            obj = self[index]
+            self[index] = last
+        else:
+            obj = last
+        self.pool.release(obj)
+
+    def discard(self, indices):
+        # Descending order keeps the remaining indices valid
+        for index in sorted(indices, reverse=True):
+            self.swap_remove(index)
+
+    def clear(self):
+        release = self.pool.release
+        for obj in self:
+            release(obj)
+        super().clear()
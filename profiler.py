@@ -0,0 +1,91 @@
+# Per-phase frame timings with rolling percentiles, an overlay and an offline trace
+import csv
+import json
+from collections import deque
+from time import perf_counter_ns
+
+# Game.run phases, then the Simulation.update phases nested inside "update"
+FRAME_PHASES = ("events", "update", "draw", "flip", "idle")
+UPDATE_PHASES = ("player", "bullets", "enemies", "boss", "powerups", "particles",
+                 "spawning", "collisions")
+PHASES = FRAME_PHASES + UPDATE_PHASES
+COUNTS = ("bullets", "enemy_bullets", "enemies", "powerups", "particles")
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class FrameProfiler:
+    def __init__(self, window=300, trace_path=None):
+        self.samples = {name: deque(maxlen=window) for name in PHASES}
+        self.frame = {name: 0 for name in PHASES}
+        self.counts = {name: 0 for name in COUNTS}
+        self.frames = 0
+        self.trace_file = None
+        self.trace_writer = None
+        if trace_path:
+            self.trace_file = open(trace_path, "w", newline="")
+            if trace_path.endswith(".csv"):
+                self.trace_writer = csv.writer(self.trace_file)
+                self.trace_writer.writerow(("frame",) + tuple(f"{n}_ns" for n in PHASES) + COUNTS)
+
+    def lap(self, name, start):
+        # Charge the time since start to name and return now as the next start
+        now = perf_counter_ns()
+        self.frame[name] += now - start
+        return now
+
+    def record_counts(self, sim):
+        counts = self.counts
+        counts["bullets"] = len(sim.bullets)
+        counts["enemy_bullets"] = len(sim.enemy_bullets)
+        counts["enemies"] = len(sim.enemies)
+        counts["powerups"] = len(sim.powerups)
+        counts["particles"] = len(sim.particles)
+
+    def end_frame(self):
+        frame = self.frame
+        for name in PHASES:
+            self.samples[name].append(frame[name])
+        if self.trace_file:
+            if self.trace_writer:
+                self.trace_writer.writerow((self.frames,) + tuple(frame[n] for n in PHASES)
+                                           + tuple(self.counts[n] for n in COUNTS))
+            else:
+                self.trace_file.write(json.dumps({"frame": self.frames, "phases_ns": frame,
+                                                  "counts": self.counts}) + "\n")
+        self.frames += 1
+        for name in PHASES:
+            frame[name] = 0
+
+    def summary(self):
+        # {phase: (p50, p95, p99)} in milliseconds over the rolling window
+        result = {}
+        for name in PHASES:
+            ordered = sorted(self.samples[name])
+            result[name] = tuple(percentile(ordered, f) / 1e6 for f in (0.50, 0.95, 0.99))
+        return result
+
+    def draw(self, screen, font, pos=(10, 120), color=(0, 255, 0), column=60):
+        # Proportional fonts don't align with padding, so each cell gets its own column
+        x, y = pos
+        rows = [("phase (ms)", "p50", "p95", "p99")]
+        for name, values in self.summary().items():
+            rows.append((name,) + tuple(f"{value:.2f}" for value in values))
+        rects = []
+        for row in rows:
+            for i, cell in enumerate(row):
+                offset = 0 if i == 0 else column * (i + 1)
+                rects.append(screen.blit(font.render(cell, True, color), (x + offset, y)))
+            y += font.get_linesize()
+        counts = "  ".join(f"{name}={value}" for name, value in self.counts.items())
+        rects.append(screen.blit(font.render(counts, True, color), (x, y)))
+        return rects[0].unionall(rects[1:])
+
+    def close(self):
+        if self.trace_file:
+            self.trace_file.close()
+            self.trace_file = None
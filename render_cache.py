@@ -0,0 +1,52 @@
+# Pre-rendered entity sprites and an LRU cache of rendered HUD text
+from collections import OrderedDict
+
+from lazy_import import lazy_import
+
+pygame = lazy_import("pygame")
+
+# Room around an entity's radius for outlines such as the player's shield ring
+SPRITE_MARGIN = 6
+
+
+class SpriteCache:
+    def __init__(self):
+        self.sprites = {}
+
+    def get(self, entity):
+        key = entity.sprite_key()
+        entry = self.sprites.get(key)
+        if entry is None:
+            half = int(entity.radius) + SPRITE_MARGIN
+            surface = pygame.Surface((half * 2, half * 2), pygame.SRCALPHA)
+            entity.draw_body(surface, half, half)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            entry = self.sprites[key] = (surface, half)
+        return entry
+
+    def blit(self, screen, entity):
+        surface, half = self.get(entity)
+        return screen.blit(surface, (int(entity.x) - half, int(entity.y) - half))
+
+
+class TextCache:
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
@@ -0,0 +1,93 @@
+# Lockstep replays: the run's seed and campaign plus one input bitmask and state checksum per tick
+import argparse
+import json
+import struct
+import time
+
+REPLAY_MAGIC = b"SXRP"
+# Version 2 dropped the particle count from the per-tick checksum
+REPLAY_VERSION = 3
+HEADER = struct.Struct("<4sHQ")
+# Version 3 added the campaign's JSON source after the header; empty means the built-in one
+CAMPAIGN = struct.Struct("<I")
+FRAME = struct.Struct("<BI")
+
+
+class ReplayWriter:
+    def __init__(self, path, seed, campaign=b"", buffer_size=1 << 16):
+        self.file = open(path, "wb", buffering=buffer_size)
+        self.file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed))
+        self.file.write(CAMPAIGN.pack(len(campaign)))
+        self.file.write(campaign)
+        self.ticks = 0
+
+    def write_tick(self, bits, checksum):
+        self.file.write(FRAME.pack(bits, checksum))
+        self.ticks += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_replay(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed = HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC:
+        raise ValueError(f"{path} is not a replay file")
+    if version == 1:
+        raise ValueError(f"{path} was recorded with the old checksum, which counted particles")
+    if version not in (2, REPLAY_VERSION):
+        raise ValueError(f"Unsupported replay version {version}")
+    offset = HEADER.size
+    campaign = b""
+    if version >= 3:
+        size = CAMPAIGN.unpack_from(data, offset)[0]
+        offset += CAMPAIGN.size
+        campaign = bytes(data[offset:offset + size])
+        offset += size
+    body = memoryview(data)[offset:]
+    body = body[:len(body) - len(body) % FRAME.size]
+    return seed, campaign, list(FRAME.iter_unpack(body))
+
+
+def verify_replay(path, vectorized=False, continuous=False):
+    # Re-simulate headlessly; returns the first tick whose checksum differs, or None
+    from space_explorer import Simulation, InputState
+    from waves import compile_campaign
+
+    seed, campaign, frames = read_replay(path)
+    campaign = compile_campaign(json.loads(campaign)) if campaign else None
+    sim = Simulation(vectorized, seed=seed, campaign=campaign, continuous=continuous)
+    inputs = [InputState.from_bits(bits) for bits in range(32)]
+    for bits, checksum in frames:
+        sim.update(inputs[bits])
+        if sim.checksum() != checksum:
+            return sim.tick
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify a Space Explorer replay")
+    parser.add_argument("path")
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--ccd", action="store_true", help="the run used continuous collision detection")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    mismatch = verify_replay(args.path, args.vectorized, args.ccd)
+    elapsed = time.perf_counter() - start
+    seed, _, frames = read_replay(args.path)
+    speedup = len(frames) / 60 / elapsed if elapsed else float("inf")
+    if mismatch is None:
+        print(f"OK: {len(frames)} ticks (seed {seed}) in {elapsed:.2f}s, {speedup:.0f}x real-time")
+    else:
+        print(f"DESYNC at tick {mismatch}")
+        raise SystemExit(1)
@@ -0,0 +1,154 @@
+# Optional simulation thread: ticks at a fixed rate and publishes immutable render snapshots,
+# so a stall in the render thread's flip never delays the simulation
+import threading
+import time
+from collections import deque
+
+
+def _clone(entity):
+    clone = object.__new__(type(entity))
+    if hasattr(entity, "__dict__"):
+        clone.__dict__.update(entity.__dict__)
+    else:
+        for name in type(entity).__slots__:
+            setattr(clone, name, getattr(entity, name))
+    return clone
+
+
+def _positions(sim):
+    # Positions before a tick, keyed by the live entity, as Game.remember_positions takes them
+    previous = {player: (player.x, player.y) for player in sim.players}
+    if not sim.vectorized:
+        for enemy in sim.enemies:
+            previous[enemy] = (enemy.x, enemy.y)
+    for powerup in sim.powerups:
+        previous[powerup] = (powerup.x, powerup.y)
+    if sim.boss:
+        previous[sim.boss] = (sim.boss.x, sim.boss.y)
+    return previous
+
+
+class BulletRows:
+    # List-mode bullets copied out as (x, y, vel_x, vel_y, color) tuples; cloning each Bullet
+    # cost as much as a whole tick in a bullet storm
+    def __init__(self, bullets):
+        self.rows = [(b.x, b.y, b.vel_x, b.vel_y, b.color) for b in bullets]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class ParticleRows:
+    # List-mode particles as (x, y, vel_x, vel_y, color, lifetime) tuples, for ParticleRenderer
+    def __init__(self, particles):
+        self.rows = [(p.x, p.y, p.vel_x, p.vel_y, p.color, p.lifetime) for p in particles]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class RenderSnapshot:
+    # Everything Game.draw reads, copied out of the Simulation after a tick. The simulation
+    # thread never touches a snapshot once published, so the render thread needs no lock
+    def __init__(self, sim, before):
+        self.tick = sim.tick
+        self.wave = sim.wave
+        self.high_score = sim.high_score
+        self.vectorized = sim.vectorized
+        self.game_over = sim.game_over
+        previous = {}
+
+        def copy(entity):
+            clone = _clone(entity)
+            position = before.get(entity)
+            if position is not None:
+                previous[clone] = position
+            return clone
+
+        self.players = [copy(player) for player in sim.players]
+        self.player = self.players[0]
+        self.powerups = [copy(powerup) for powerup in sim.powerups]
+        self.boss = copy(sim.boss) if sim.boss else None
+        if sim.vectorized:
+            self.enemies = sim.enemies.copy()
+            self.bullets = sim.bullets.copy()
+            self.enemy_bullets = sim.enemy_bullets.copy()
+            self.particles = sim.particles.copy()
+        else:
+            self.enemies = [copy(enemy) for enemy in sim.enemies]
+            self.bullets = BulletRows(sim.bullets)
+            self.enemy_bullets = BulletRows(sim.enemy_bullets)
+            self.particles = ParticleRows(sim.particles)
+        # Last-tick positions of the copies, for Game.draw_lerped
+        self.previous = previous
+        self.published = time.perf_counter()
+
+    def live_players(self):
+        players = self.players
+        if len(players) == 1:
+            return players
+        return [player for player in players if player.health > 0] or players[:1]
+
+
+class SimulationThread(threading.Thread):
+    # Double buffered: the render thread draws the front snapshot while the next one is
+    # built, and publishing is a single reference swap. Inputs and commands cross over
+    # through deques, whose append and popleft are atomic, so neither side takes a lock
+    def __init__(self, game, idle_input, tick_seconds, max_catch_up):
+        super().__init__(name="simulation", daemon=True)
+        self.game = game
+        self.controls = idle_input
+        self.tick_seconds = tick_seconds
+        self.max_catch_up = max_catch_up
+        self.inputs = deque()
+        self.commands = deque()
+        self.front = RenderSnapshot(game.sim, {})
+        self.stopping = threading.Event()
+        # Whatever stopped the thread early; Game.run_threaded re-raises it on the main thread
+        self.error = None
+
+    def push_input(self, controls):
+        self.inputs.append(controls)
+
+    def call(self, command):
+        # Runs command() on the simulation thread between ticks
+        self.commands.append(command)
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+
+    def run(self):
+        try:
+            self.tick_loop()
+        except Exception as e:
+            self.error = e
+
+    def tick_loop(self):
+        sim = self.game.sim
+        next_tick = time.perf_counter()
+        while not self.stopping.is_set():
+            changed = False
+            while self.commands:
+                self.commands.popleft()()
+                changed = True
+            # Only the newest sampled input matters; keys are held states
+            while self.inputs:
+                self.controls = self.inputs.popleft()
+
+            now = time.perf_counter()
+            if sim.game_over:
+                next_tick = now + self.tick_seconds
+            ticks = 0
+            before = {}
+            while next_tick <= now and ticks < self.max_catch_up and not sim.game_over:
+                before = _positions(sim)
+                self.game.update(self.controls)
+                next_tick += self.tick_seconds
+                ticks += 1
+            if ticks == self.max_catch_up:
+                # Too far behind: drop the time instead of spiralling
+                next_tick = max(next_tick, now)
+            if ticks or changed or sim.game_over != self.front.game_over:
+                self.front = RenderSnapshot(sim, before)
+            self.stopping.wait(max(0.0, next_tick - time.perf_counter()))
@@ -0,0 +1,316 @@
+# Versioned binary snapshots of a whole Simulation, packed with struct and array
+import struct
+import sys
+from array import array
+
+SNAPSHOT_MAGIC = b"SXSN"
+SNAPSHOT_VERSION = 3
+HEADER = struct.Struct("<4sH")
+# Mersenne Twister words plus position, then the cached gauss value
+RNG = struct.Struct("<625I?d")
+# seed, tick, wave, kills, enemy/powerup spawn timers, high score,
+# boss spawned, boss spawn tick, boss kill time count
+STATE = struct.Struct("<Qqqqqqq?qI")
+# Version 2 added co-op: a player count ahead of the player records
+PLAYER_COUNT = struct.Struct("<B")
+# x, y, then speed, health, max health, score, radius, weapon cooldown, shield, power level
+PLAYER = struct.Struct("<2d8q")
+# present, x, y, speed, then health, max health, radius, direction, cooldown, phase, attack pattern
+BOSS = struct.Struct("<?3d7q")
+# Version 3 added the rotating emitters' current angles after the boss record, in phase order
+# enemies, powerups, player bullets, enemy bullets, particles
+COUNTS = struct.Struct("<5I")
+STRING = struct.Struct("<B")
+TABLE = struct.Struct("<H")
+
+# Columns are stored little-endian
+_SWAP = sys.byteorder == "big"
+
+
+class _Writer:
+    def __init__(self):
+        self.chunks = []
+
+    def pack(self, fmt, *values):
+        self.chunks.append(fmt.pack(*values))
+
+    def column(self, values):
+        if _SWAP:
+            values = array(values.typecode, values)
+            values.byteswap()
+        self.chunks.append(values.tobytes())
+
+    def strings(self, strings):
+        self.pack(TABLE, len(strings))
+        for s in strings:
+            encoded = s.encode()
+            self.pack(STRING, len(encoded))
+            self.chunks.append(encoded)
+
+    def getvalue(self):
+        return b"".join(self.chunks)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt):
+        if self.offset + fmt.size > len(self.data):
+            raise ValueError("Truncated snapshot")
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def column(self, typecode, count):
+        values = array(typecode)
+        end = self.offset + values.itemsize * count
+        if end > len(self.data):
+            raise ValueError("Truncated snapshot")
+        values.frombytes(self.data[self.offset:end])
+        self.offset = end
+        if _SWAP:
+            values.byteswap()
+        return values
+
+    def strings(self):
+        strings = []
+        for _ in range(self.unpack(TABLE)[0]):
+            size = self.unpack(STRING)[0]
+            end = self.offset + size
+            if end > len(self.data):
+                raise ValueError("Truncated snapshot")
+            try:
+                strings.append(bytes(self.data[self.offset:end]).decode())
+            except UnicodeDecodeError:
+                raise ValueError("Corrupt snapshot string table") from None
+            self.offset = end
+        return strings
+
+
+def _intern(value, table, index):
+    i = index.get(value)
+    if i is None:
+        i = index[value] = len(table)
+        table.append(value)
+    return i
+
+
+def _projectile_columns(container, palette, palette_index, life):
+    # x, y, vel_x, vel_y, color ids (and lifetimes) from a PooledList or an EntityStore
+    if hasattr(container, "palette"):
+        n = container.count
+        columns = [array("d", column[:n].tobytes())
+                   for column in (container.x, container.y, container.vel_x, container.vel_y)]
+        remap = [_intern(color, palette, palette_index) for color in container.palette]
+        columns.append(array("H", [remap[i] for i in container.color[:n].tolist()]))
+        if life:
+            columns.append(array("q", container.life[:n].astype("int64").tobytes()))
+        return columns
+    columns = [array("d", [e.x for e in container]), array("d", [e.y for e in container]),
+               array("d", [e.vel_x for e in container]), array("d", [e.vel_y for e in container]),
+               array("H", [_intern(e.color, palette, palette_index) for e in container])]
+    if life:
+        columns.append(array("q", [e.lifetime for e in container]))
+    return columns
+
+
+def _enemy_columns(enemies, names, name_index):
+    # x, y, speed, health, max health, cooldown and type ids from a list or a Swarm
+    if hasattr(enemies, "archetypes"):
+        n = enemies.count
+        columns = [array("d", column[:n].tobytes()) for column in (enemies.x, enemies.y, enemies.speed)]
+        columns += [array("q", column[:n].astype("int64").tobytes())
+                    for column in (enemies.health, enemies.max_health, enemies.cooldown)]
+        remap = [_intern(archetype.name, names, name_index) for archetype in enemies.archetypes]
+        columns.append(array("H", [remap[i] for i in enemies.code[:n].tolist()]))
+        return columns
+    return [array("d", [e.x for e in enemies]), array("d", [e.y for e in enemies]),
+            array("d", [e.speed for e in enemies]), array("q", [e.health for e in enemies]),
+            array("q", [e.max_health for e in enemies]), array("q", [e.shoot_cooldown for e in enemies]),
+            array("H", [_intern(e.enemy_type, names, name_index) for e in enemies])]
+
+
+def _check_indices(column, size, what):
+    if column and max(column) >= size:
+        raise ValueError(f"Corrupt snapshot: {what} index out of range")
+
+
+def _turning_emitters(boss):
+    # Emitters that carry state between volleys, such as a Spiral's angle
+    return [e for phase in sorted(boss.patterns) for e in boss.patterns[phase][0] if hasattr(e, "angle")]
+
+
+def _load_projectiles(container, columns, palette):
+    x, y, vel_x, vel_y, color = columns[:5]
+    if hasattr(container, "palette"):
+        container.load(x, y, vel_x, vel_y, color, palette, columns[5] if len(columns) > 5 else None)
+        return
+    container.clear()
+    spawn = container.spawn
+    if len(columns) > 5:
+        for px, py, vx, vy, c, life in zip(x, y, vel_x, vel_y, color, columns[5]):
+            spawn(px, py, vx, vy, palette[c]).lifetime = life
+    else:
+        for px, py, vx, vy, c in zip(x, y, vel_x, vel_y, color):
+            spawn(px, py, vx, vy, palette[c])
+
+
+def save_snapshot(sim):
+    out = _Writer()
+    out.pack(HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION)
+    _, words, gauss = sim.rng.getstate()
+    out.pack(RNG, *words, gauss is not None, gauss or 0.0)
+    out.pack(STATE, sim.seed, sim.tick, sim.wave, sim.enemies_killed, sim.enemy_spawn_timer,
+             sim.powerup_spawn_timer, sim.high_score, sim.boss_spawned, sim.boss_spawn_tick,
+             len(sim.boss_kill_times))
+    out.column(array("q", sim.boss_kill_times))
+
+    out.pack(PLAYER_COUNT, len(sim.players))
+    for p in sim.players:
+        out.pack(PLAYER, p.x, p.y, p.speed, p.health, p.max_health, p.score, p.radius,
+                 p.weapon_cooldown, p.shield, p.power_level)
+    boss = sim.boss
+    if boss:
+        out.pack(BOSS, True, boss.x, boss.y, boss.speed, boss.health, boss.max_health, boss.radius,
+                 boss.direction, boss.shoot_cooldown, boss.phase, boss.attack_pattern)
+    else:
+        out.pack(BOSS, False, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+    angles = [e.angle for e in _turning_emitters(boss)] if boss else []
+    out.pack(TABLE, len(angles))
+    out.column(array("q", angles))
+
+    # Names and colours are written once in tables and referenced by index
+    names = []
+    name_index = {}
+    palette = []
+    palette_index = {}
+    enemies = sim.enemies
+    powerups = sim.powerups
+    enemy_columns = _enemy_columns(enemies, names, name_index)
+    powerup_columns = [array("d", [u.x for u in powerups]), array("d", [u.y for u in powerups]),
+                       array("d", [u.speed for u in powerups]),
+                       array("H", [_intern(u.power_type, names, name_index) for u in powerups])]
+    projectiles = [_projectile_columns(sim.bullets, palette, palette_index, False),
+                   _projectile_columns(sim.enemy_bullets, palette, palette_index, False),
+                   _projectile_columns(sim.particles, palette, palette_index, True)]
+
+    out.strings(names)
+    out.pack(TABLE, len(palette))
+    out.column(array("B", [c for color in palette for c in color]))
+    out.pack(COUNTS, len(enemies), len(powerups), *(len(columns[0]) for columns in projectiles))
+    for columns in [enemy_columns, powerup_columns] + projectiles:
+        for column in columns:
+            out.column(column)
+    return out.getvalue()
+
+
+def load_snapshot(sim, data, player_class, enemy_class, boss_class, powerup_class):
+    # Overwrites sim in place; the campaign and boss patterns are the sim's own
+    reader = _Reader(data)
+    magic, version = reader.unpack(HEADER)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a snapshot")
+    if version not in (1, 2, SNAPSHOT_VERSION):
+        raise ValueError(f"Unsupported snapshot version {version}")
+    rng = reader.unpack(RNG)
+    (seed, tick, wave, kills, enemy_timer, powerup_timer, high_score, boss_spawned, boss_spawn_tick,
+     kill_times) = reader.unpack(STATE)
+    boss_kill_times = reader.column("q", kill_times).tolist()
+    count = reader.unpack(PLAYER_COUNT)[0] if version >= 2 else 1
+    players = [reader.unpack(PLAYER) for _ in range(count)]
+    boss = reader.unpack(BOSS)
+    angles = reader.column("q", reader.unpack(TABLE)[0]).tolist() if version >= 3 else None
+    names = reader.strings()
+    palette_size = reader.unpack(TABLE)[0]
+    flat = reader.column("B", palette_size * 3)
+    palette = [tuple(flat[i:i + 3]) for i in range(0, len(flat), 3)]
+    n_enemies, n_powerups, n_bullets, n_enemy_bullets, n_particles = reader.unpack(COUNTS)
+    enemy_columns = [reader.column(t, n_enemies) for t in "dddqqqH"]
+    powerup_columns = [reader.column(t, n_powerups) for t in "dddH"]
+    bullet_columns = [reader.column(t, n_bullets) for t in "ddddH"]
+    enemy_bullet_columns = [reader.column(t, n_enemy_bullets) for t in "ddddH"]
+    particle_columns = [reader.column(t, n_particles) for t in "ddddHq"]
+
+    # Everything that can fail is checked, and the boss built, before sim is touched, so a
+    # corrupt snapshot or one from another campaign raises ValueError and leaves sim as it was
+    if not players:
+        raise ValueError("Corrupt snapshot: no players")
+    if wave < 1:
+        raise ValueError(f"Corrupt snapshot: wave {wave}")
+    _check_indices(enemy_columns[6], len(names), "enemy type")
+    _check_indices(powerup_columns[3], len(names), "power-up type")
+    for columns in (bullet_columns, enemy_bullet_columns, particle_columns):
+        _check_indices(columns[4], len(palette), "colour")
+    archetypes = sim.campaign.archetypes
+    missing = {names[i] for i in set(enemy_columns[6])} - set(archetypes)
+    if missing:
+        raise ValueError(f"Snapshot enemies {sorted(missing)} are not in this campaign")
+    b = None
+    if boss[0]:
+        b = boss_class(boss[1], boss[2], sim.rng)
+        (b.speed, b.health, b.max_health, b.radius, b.direction, b.shoot_cooldown,
+         b.phase, b.attack_pattern) = boss[3:]
+        if angles is not None:
+            emitters = _turning_emitters(b)
+            if len(emitters) != len(angles):
+                raise ValueError("Snapshot boss emitters do not match the boss patterns")
+            for emitter, angle in zip(emitters, angles):
+                emitter.angle = angle
+        if b.phase not in b.patterns:
+            raise ValueError(f"Corrupt snapshot: boss phase {b.phase}")
+
+    sim.rng.setstate((3, rng[:625], rng[626] if rng[625] else None))
+    sim.seed = seed
+    sim.tick = tick
+    sim.wave = wave
+    sim.wave_plan = sim.campaign.wave(wave)
+    sim.enemies_killed = kills
+    sim.enemy_spawn_timer = enemy_timer
+    sim.powerup_spawn_timer = powerup_timer
+    sim.high_score = high_score
+    sim.boss_spawned = boss_spawned
+    sim.boss_spawn_tick = boss_spawn_tick
+    sim.boss_kill_times = boss_kill_times
+
+    sim.players = []
+    for record in players:
+        p = player_class(record[0], record[1])
+        (p.speed, p.health, p.max_health, p.score, p.radius,
+         p.weapon_cooldown, p.shield, p.power_level) = record[2:]
+        sim.players.append(p)
+    sim.player = sim.players[0]
+    sim.player_count = len(sim.players)
+    sim.boss = b
+
+    # Enemies are rebuilt without __init__, which would draw from the restored RNG
+    kinds = [archetypes[names[name]] for name in enemy_columns[6]]
+    if sim.vectorized:
+        sim.enemies.load(*enemy_columns[:6], kinds)
+    else:
+        enemies = []
+        for x, y, speed, health, max_health, cooldown, archetype in zip(*enemy_columns[:6], kinds):
+            e = enemy_class.__new__(enemy_class)
+            e.x = x
+            e.y = y
+            e.enemy_type = archetype.name
+            e.archetype = archetype
+            e.rng = sim.rng
+            e.speed = speed
+            e.radius = archetype.radius
+            e.health = health
+            e.max_health = max_health
+            e.shoot_cooldown = cooldown
+            e.color = archetype.color
+            enemies.append(e)
+        sim.enemies = enemies
+    powerups = []
+    for x, y, speed, power_type in zip(*powerup_columns):
+        u = powerup_class(x, y, names[power_type])
+        u.speed = speed
+        powerups.append(u)
+    sim.powerups = powerups
+    _load_projectiles(sim.bullets, bullet_columns, palette)
+    _load_projectiles(sim.enemy_bullets, enemy_bullet_columns, palette)
+    _load_projectiles(sim.particles, particle_columns, palette)
@@ -1,16 +1,38 @@
-import pygame
 import random
 import math
-import json
 import os
+import argparse
+import zlib
+import heapq
+import time
+from array import array
+from time import perf_counter_ns
 
-# Initialize Pygame
-pygame.init()
+from spatial_hash import SpatialHash, sweep_circle
+from render_cache import SpriteCache, TextCache
+from dirty_rects import DirtyRectTracker
+from pools import Pool, PooledList
+from profiler import FrameProfiler
+from starfield import Starfield
+from particles import ParticleRenderer
+from persistence import DATA_DIR, PersistenceService
+from waves import compile_campaign, load_campaign
+from bullet_patterns import Ring, Scatter, Stream
+from lazy_import import lazy_import
+from snapshot import save_snapshot, load_snapshot
+from sim_thread import SimulationThread
+
+# Importing stays cheap and headless: pygame loads on first use, and Game
+# initializes only the display and font subsystems it needs
+pygame = lazy_import("pygame")
 
 # Game Constants
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
-FPS = 60
+FPS = 60  # Simulation ticks per second
+TICK_SECONDS = 1 / FPS
+RENDER_FPS_CAP = 240  # 0 renders as fast as the display allows
+MAX_TICKS_PER_FRAME = 5  # Past this a slow machine drops time instead of spiralling
 
 # Colors
 BLACK = (0, 0, 0)
@@ -23,24 +45,93 @@ PURPLE = (128, 0, 128)
 ORANGE = (255, 165, 0)
 CYAN = (0, 255, 255)
 
+BULLET_RADIUS = 3
+
+# Balance knobs (swept by batch_sim.py)
+SMART_ENEMY_CHANCE = 0.3
+POWERUP_CHANCE = 0.3
+SPAWN_INTERVAL_START = 120
+SPAWN_INTERVAL_STEP = 10
+SPAWN_INTERVAL_MIN = 30
+KILLS_PER_WAVE = 10
+BOSS_PHASE2_HEALTH = 150
+BOSS_PHASE3_HEALTH = 75
+
+# Cap on live particles; past it the oldest are dropped first
+PARTICLE_BUDGET = 1500
+
+# Collision broad phase
+COLLISION_CELL_SIZE = 64
+BOSS_KEY = -1
+
 class Particle:
-    def __init__(self, x, y, color, velocity):
+    __slots__ = ("x", "y", "vel_x", "vel_y", "color", "lifetime", "max_lifetime")
+    
+    def __init__(self, x, y, vel_x, vel_y, color):
+        self.reset(x, y, vel_x, vel_y, color)
+        
+    def reset(self, x, y, vel_x, vel_y, color):
         self.x = x
         self.y = y
+        self.vel_x = vel_x
+        self.vel_y = vel_y
         self.color = color
-        self.velocity = velocity
         self.lifetime = 30
         self.max_lifetime = 30
     
     def update(self):
-        self.x += self.velocity[0]
-        self.y += self.velocity[1]
+        self.x += self.vel_x
+        self.y += self.vel_y
         self.lifetime -= 1
         
     def draw(self, screen):
-        alpha = int(255 * (self.lifetime / self.max_lifetime))
-        color_with_alpha = (*self.color, alpha)
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), 3)
+        fade = self.lifetime / self.max_lifetime
+        color = tuple(int(c * fade) for c in self.color)
+        return pygame.draw.circle(screen, color, (int(self.x), int(self.y)), 3)
+
+# Input bitmask layout used by replays
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_UP = 4
+INPUT_DOWN = 8
+INPUT_SHOOT = 16
+
+class InputState:
+    def __init__(self, left=False, right=False, up=False, down=False, shoot=False):
+        self.left = left
+        self.right = right
+        self.up = up
+        self.down = down
+        self.shoot = shoot
+        
+    @classmethod
+    def from_bits(cls, bits):
+        return cls(
+            left=bool(bits & INPUT_LEFT),
+            right=bool(bits & INPUT_RIGHT),
+            up=bool(bits & INPUT_UP),
+            down=bool(bits & INPUT_DOWN),
+            shoot=bool(bits & INPUT_SHOOT),
+        )
+        
+    def to_bits(self):
+        return ((INPUT_LEFT if self.left else 0)
+                | (INPUT_RIGHT if self.right else 0)
+                | (INPUT_UP if self.up else 0)
+                | (INPUT_DOWN if self.down else 0)
+                | (INPUT_SHOOT if self.shoot else 0))
+        
+    @classmethod
+    def from_keys(cls, keys):
+        return cls(
+            left=bool(keys[pygame.K_LEFT] or keys[pygame.K_a]),
+            right=bool(keys[pygame.K_RIGHT] or keys[pygame.K_d]),
+            up=bool(keys[pygame.K_UP] or keys[pygame.K_w]),
+            down=bool(keys[pygame.K_DOWN] or keys[pygame.K_s]),
+            shoot=bool(keys[pygame.K_SPACE]),
+        )
+
+IDLE_INPUT = InputState()
 
 class Player:
     def __init__(self, x, y):
@@ -55,15 +146,14 @@ class Player:
         self.shield = 0
         self.power_level = 1
         
-    def update(self):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+    def update(self, controls):
+        if controls.left:
             self.x -= self.speed
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        if controls.right:
             self.x += self.speed
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
+        if controls.up:
             self.y -= self.speed
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        if controls.down:
             self.y += self.speed
             
         # Keep player on screen
@@ -76,29 +166,40 @@ class Player:
     def shoot(self, bullets):
         if self.weapon_cooldown == 0:
             if self.power_level == 1:
-                bullets.append(Bullet(self.x, self.y - 20, 0, -8, YELLOW))
+                bullets.spawn(self.x, self.y - 20, 0, -8, YELLOW)
             elif self.power_level == 2:
-                bullets.append(Bullet(self.x - 10, self.y - 20, 0, -8, YELLOW))
-                bullets.append(Bullet(self.x + 10, self.y - 20, 0, -8, YELLOW))
+                bullets.spawn(self.x - 10, self.y - 20, 0, -8, YELLOW)
+                bullets.spawn(self.x + 10, self.y - 20, 0, -8, YELLOW)
             else:  # power_level >= 3
-                bullets.append(Bullet(self.x, self.y - 20, 0, -8, YELLOW))
-                bullets.append(Bullet(self.x - 15, self.y - 20, -2, -8, YELLOW))
-                bullets.append(Bullet(self.x + 15, self.y - 20, 2, -8, YELLOW))
+                bullets.spawn(self.x, self.y - 20, 0, -8, YELLOW)
+                bullets.spawn(self.x - 15, self.y - 20, -2, -8, YELLOW)
+                bullets.spawn(self.x + 15, self.y - 20, 2, -8, YELLOW)
             self.weapon_cooldown = 10
     
-    def draw(self, screen):
+    def sprite_key(self):
+        return ("player", self.radius, self.shield > 0)
+        
+    def draw_body(self, surface, x, y):
         # Draw shield if active
+        shield_rect = None
         if self.shield > 0:
-            pygame.draw.circle(screen, CYAN, (int(self.x), int(self.y)), self.radius + 5, 2)
+            shield_rect = pygame.draw.circle(surface, CYAN, (int(x), int(y)), self.radius + 5, 2)
         
         # Draw player ship
         points = [
-            (self.x, self.y - self.radius),
-            (self.x - self.radius, self.y + self.radius),
-            (self.x, self.y + self.radius//2),
-            (self.x + self.radius, self.y + self.radius)
+            (x, y - self.radius),
+            (x - self.radius, y + self.radius),
+            (x, y + self.radius//2),
+            (x + self.radius, y + self.radius)
         ]
-        pygame.draw.polygon(screen, GREEN, points)
+        rect = pygame.draw.polygon(surface, GREEN, points)
+        return rect.union(shield_rect) if shield_rect else rect
+        
+    def draw(self, screen, sprites=None):
+        if sprites:
+            rect = sprites.blit(screen, self)
+        else:
+            rect = self.draw_body(screen, self.x, self.y)
         
         # Draw health bar
         bar_width = 60
@@ -106,64 +207,74 @@ class Player:
         bar_x = self.x - bar_width // 2
         bar_y = self.y - self.radius - 15
         
-        pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))
+        rect = rect.union(pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height)))
         health_width = int(bar_width * (self.health / self.max_health))
         pygame.draw.rect(screen, GREEN, (bar_x, bar_y, health_width, bar_height))
+        return rect
 
 class Enemy:
-    def __init__(self, x, y, enemy_type="basic"):
+    def __init__(self, x, y, enemy_type="basic", rng=random, archetype=None):
+        # Behaviour, stats and looks all come from a compiled archetype (see waves.py)
+        if archetype is None:
+            archetype = default_campaign().archetypes[enemy_type]
         self.x = x
         self.y = y
-        self.enemy_type = enemy_type
-        self.speed = random.uniform(1, 3)
-        self.radius = 12
-        self.health = 20 if enemy_type == "basic" else 50
+        self.enemy_type = archetype.name
+        self.archetype = archetype
+        self.rng = rng
+        self.speed = rng.uniform(*archetype.speed)
+        self.radius = archetype.radius
+        self.health = archetype.health
         self.max_health = self.health
-        self.shoot_cooldown = random.randint(30, 90)
-        self.color = RED if enemy_type == "basic" else PURPLE
+        self.shoot_cooldown = rng.randint(*archetype.first_shot)
+        self.color = archetype.color
         
     def update(self, player, enemy_bullets):
+        archetype = self.archetype
         self.y += self.speed
-        
-        # Simple AI to move towards player
-        if self.enemy_type == "smart":
-            dx = player.x - self.x
-            if abs(dx) > 5:
-                self.x += 1 if dx > 0 else -1
+        archetype.move(self, player)
         
         self.shoot_cooldown -= 1
         if self.shoot_cooldown <= 0 and self.y > 50:
-            if self.enemy_type == "basic":
-                enemy_bullets.append(Bullet(self.x, self.y + 15, 0, 4, RED))
-                self.shoot_cooldown = random.randint(60, 120)
-            else:  # smart enemy
-                dx = player.x - self.x
-                dy = player.y - self.y
-                distance = math.sqrt(dx*dx + dy*dy)
-                if distance > 0:
-                    vel_x = (dx / distance) * 3
-                    vel_y = (dy / distance) * 3
-                    enemy_bullets.append(Bullet(self.x, self.y, vel_x, vel_y, PURPLE))
-                self.shoot_cooldown = random.randint(40, 80)
+            archetype.fire(self, player, enemy_bullets)
+            self.shoot_cooldown = self.rng.randint(*archetype.reload)
         
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
+    def sprite_key(self):
+        return ("enemy", self.color, self.radius)
         
-        # Draw health bar for smart enemies
-        if self.enemy_type == "smart":
+    def draw_body(self, surface, x, y):
+        return pygame.draw.circle(surface, self.color, (int(x), int(y)), self.radius)
+        
+    def draw(self, screen, sprites=None):
+        if sprites:
+            rect = sprites.blit(screen, self)
+        else:
+            rect = self.draw_body(screen, self.x, self.y)
+        
+        if self.archetype.health_bar:
             bar_width = 30
             bar_height = 4
             bar_x = self.x - bar_width // 2
             bar_y = self.y - self.radius - 8
             
-            pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))
+            rect = rect.union(pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height)))
             health_width = int(bar_width * (self.health / self.max_health))
             pygame.draw.rect(screen, GREEN, (bar_x, bar_y, health_width, bar_height))
+        return rect
+
+def boss_patterns():
+    # Per phase: emitters fired together each volley, and the ticks between volleys
+    return {
+        1: ((Stream(90, 5, RED, offset=(0, 20)),), 30),
+        2: ((Ring(8, 3, ORANGE),), 60),
+        3: ((Scatter(3, 4, PURPLE),), 40),
+    }
 
 class Boss:
-    def __init__(self, x, y):
+    def __init__(self, x, y, rng=random, patterns=None):
         self.x = x
         self.y = y
+        self.rng = rng
         self.health = 200
         self.max_health = 200
         self.radius = 40
@@ -172,6 +283,7 @@ class Boss:
         self.shoot_cooldown = 0
         self.phase = 1
         self.attack_pattern = 0
+        self.patterns = patterns or boss_patterns()
         
     def update(self, player, enemy_bullets):
         # Move side to side
@@ -182,35 +294,32 @@ class Boss:
         self.shoot_cooldown -= 1
         
         # Different attack patterns based on health
-        if self.health > 150:  # Phase 1
-            if self.shoot_cooldown <= 0:
-                enemy_bullets.append(Bullet(self.x, self.y + 20, 0, 5, RED))
-                self.shoot_cooldown = 30
-        elif self.health > 75:  # Phase 2
-            if self.shoot_cooldown <= 0:
-                for angle in range(0, 360, 45):
-                    rad = math.radians(angle)
-                    vel_x = math.cos(rad) * 3
-                    vel_y = math.sin(rad) * 3
-                    enemy_bullets.append(Bullet(self.x, self.y, vel_x, vel_y, ORANGE))
-                self.shoot_cooldown = 60
-        else:  # Phase 3
-            if self.shoot_cooldown <= 0:
-                # Aimed shots at player
-                for i in range(3):
-                    dx = player.x - self.x + random.randint(-50, 50)
-                    dy = player.y - self.y
-                    distance = math.sqrt(dx*dx + dy*dy)
-                    if distance > 0:
-                        vel_x = (dx / distance) * 4
-                        vel_y = (dy / distance) * 4
-                        enemy_bullets.append(Bullet(self.x, self.y, vel_x, vel_y, PURPLE))
-                self.shoot_cooldown = 40
+        if self.health > BOSS_PHASE2_HEALTH:
+            self.phase = 1
+        elif self.health > BOSS_PHASE3_HEALTH:
+            self.phase = 2
+        else:
+            self.phase = 3
+        if self.shoot_cooldown <= 0:
+            emitters, cooldown = self.patterns[self.phase]
+            for emitter in emitters:
+                emitter.fire(self.x, self.y, player, enemy_bullets, self.rng)
+            self.shoot_cooldown = cooldown
                 
-    def draw(self, screen):
+    def sprite_key(self):
+        return ("boss", self.radius)
+        
+    def draw_body(self, surface, x, y):
+        rect = pygame.draw.circle(surface, RED, (int(x), int(y)), self.radius)
+        pygame.draw.circle(surface, ORANGE, (int(x), int(y)), self.radius - 10)
+        return rect
+        
+    def draw(self, screen, sprites=None):
         # Draw boss body
-        pygame.draw.circle(screen, RED, (int(self.x), int(self.y)), self.radius)
-        pygame.draw.circle(screen, ORANGE, (int(self.x), int(self.y)), self.radius - 10)
+        if sprites:
+            rect = sprites.blit(screen, self)
+        else:
+            rect = self.draw_body(screen, self.x, self.y)
         
         # Draw health bar
         bar_width = 100
@@ -218,25 +327,44 @@ class Boss:
         bar_x = self.x - bar_width // 2
         bar_y = self.y - self.radius - 20
         
-        pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))
+        rect = rect.union(pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height)))
         health_width = int(bar_width * (self.health / self.max_health))
         pygame.draw.rect(screen, GREEN, (bar_x, bar_y, health_width, bar_height))
+        return rect
 
 class Bullet:
+    __slots__ = ("x", "y", "vel_x", "vel_y", "color", "radius", "fresh")
+    
     def __init__(self, x, y, vel_x, vel_y, color):
+        self.reset(x, y, vel_x, vel_y, color)
+        
+    def reset(self, x, y, vel_x, vel_y, color):
         self.x = x
         self.y = y
         self.vel_x = vel_x
         self.vel_y = vel_y
         self.color = color
-        self.radius = 3
+        self.radius = BULLET_RADIUS
+        # Spawned since the last update, so it has no motion to sweep yet
+        self.fresh = True
         
     def update(self):
         self.x += self.vel_x
         self.y += self.vel_y
+        self.fresh = False
         
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
+    def sprite_key(self):
+        return ("bullet", self.color, self.radius)
+        
+    def draw_body(self, surface, x, y):
+        return pygame.draw.circle(surface, self.color, (int(x), int(y)), self.radius)
+        
+    def draw(self, screen, sprites=None):
+        if sprites:
+            rect = sprites.blit(screen, self)
+        else:
+            rect = self.draw_body(screen, self.x, self.y)
+        return rect
 
 class PowerUp:
     def __init__(self, x, y, power_type):
@@ -255,291 +383,884 @@ class PowerUp:
     def update(self):
         self.y += self.speed
         
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.colors[self.power_type], (int(self.x), int(self.y)), self.radius)
+    def sprite_key(self):
+        return ("powerup", self.power_type, self.radius)
+        
+    def draw_body(self, surface, x, y):
+        rect = pygame.draw.circle(surface, self.colors[self.power_type], (int(x), int(y)), self.radius)
         
         # Draw power-up symbol
         if self.power_type == "health":
-            pygame.draw.line(screen, WHITE, (self.x-4, self.y), (self.x+4, self.y), 2)
-            pygame.draw.line(screen, WHITE, (self.x, self.y-4), (self.x, self.y+4), 2)
+            pygame.draw.line(surface, WHITE, (x-4, y), (x+4, y), 2)
+            pygame.draw.line(surface, WHITE, (x, y-4), (x, y+4), 2)
         elif self.power_type == "shield":
-            pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), 4, 1)
+            pygame.draw.circle(surface, WHITE, (int(x), int(y)), 4, 1)
         elif self.power_type == "weapon":
-            pygame.draw.polygon(screen, WHITE, [(self.x, self.y-4), (self.x-3, self.y+2), (self.x+3, self.y+2)])
+            pygame.draw.polygon(surface, WHITE, [(x, y-4), (x-3, y+2), (x+3, y+2)])
+        return rect
+            
+    def draw(self, screen, sprites=None):
+        if sprites:
+            rect = sprites.blit(screen, self)
+        else:
+            rect = self.draw_body(screen, self.x, self.y)
+        return rect
 
-class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Space Explorer - Built with Amazon Q CLI")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
+_default_campaigns = {}
+
+
+def default_campaign():
+    # The built-in campaign follows the balance knobs above, so batch_sim sweeps still apply
+    knobs = (SMART_ENEMY_CHANCE, SPAWN_INTERVAL_START, SPAWN_INTERVAL_STEP, SPAWN_INTERVAL_MIN, KILLS_PER_WAVE)
+    campaign = _default_campaigns.get(knobs)
+    if campaign is None:
+        mix = [["smart", SMART_ENEMY_CHANCE], ["basic", 1 - SMART_ENEMY_CHANCE]]
+        campaign = compile_campaign({
+            "archetypes": {
+                "basic": {"health": 20, "color": RED, "speed": [1, 3], "first_shot": [30, 90],
+                          "reload": [60, 120], "move": "descend", "fire": "straight",
+                          "bullet_speed": 4, "bullet_offset": 15, "score": 10},
+                "smart": {"health": 50, "color": PURPLE, "speed": [1, 3], "first_shot": [30, 90],
+                          "reload": [40, 80], "move": "home", "fire": "aimed",
+                          "bullet_speed": 3, "score": 25, "health_bar": True},
+            },
+            "endless": {"spawn_interval": {"start": SPAWN_INTERVAL_START, "step": -SPAWN_INTERVAL_STEP,
+                                           "min": SPAWN_INTERVAL_MIN},
+                        "kills": KILLS_PER_WAVE, "mix": mix},
+        })
+        _default_campaigns[knobs] = campaign
+    return campaign
+
+
+class Simulation:
+    # Headless game core: advanced one tick at a time from an InputState
+    def __init__(self, vectorized=False, high_score=0, seed=None, particle_budget=PARTICLE_BUDGET,
+                 campaign=None, continuous=False, players=1):
+        if vectorized:
+            try:
+                from entity_store import EntityStore
+                from swarm import Swarm
+            except ImportError:  # NumPy is optional; only the vectorized mode needs it
+                raise RuntimeError("Vectorized mode requires NumPy")
+        self.vectorized = vectorized
+        # Continuous mode sweeps bullets along their last tick of motion so fast shots cannot tunnel
+        self.continuous = continuous
+        self.player_count = players
+        self.high_score = high_score
+        self.collision_grid = SpatialHash(COLLISION_CELL_SIZE)
+        self.profiler = None
+        self.particle_budget = particle_budget
+        # When a list, every explosion is appended as (x, y, color, count); netplay sends these
+        self.explosion_log = None
+        self.campaign = campaign or default_campaign()
         
-        self.reset_game()
+        # Bullets and particles live for the whole Simulation and are recycled;
+        # vectorized mode also keeps enemies in arrays and moves them in one batched pass
+        if vectorized:
+            self.enemies = Swarm(SCREEN_HEIGHT)
+            self.bullets = EntityStore(radius=BULLET_RADIUS)
+            self.enemy_bullets = EntityStore(radius=BULLET_RADIUS)
+            self.particles = EntityStore(radius=3, lifetime=30)
+        else:
+            self.enemies = []
+            self.bullet_pool = Pool(Bullet)
+            self.particle_pool = Pool(Particle)
+            self.bullets = PooledList(self.bullet_pool)
+            self.enemy_bullets = PooledList(self.bullet_pool)
+            self.particles = PooledList(self.particle_pool)
+        self.reset_game(seed)
         
-        # Load high score
-        self.high_score = self.load_high_score()
-        
-    def reset_game(self):
-        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
-        self.bullets = []
-        self.enemies = []
-        self.enemy_bullets = []
+    def reset_game(self, seed=None):
+        # Every random draw in a run comes from this seeded generator
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # Co-op ships start evenly spaced; the score is pooled on the first one
+        spacing = SCREEN_WIDTH // (self.player_count + 1)
+        self.players = [Player(spacing * (i + 1), SCREEN_HEIGHT - 100) for i in range(self.player_count)]
+        self.player = self.players[0]
+        self.enemies.clear()
         self.powerups = []
-        self.particles = []
+        self.bullets.clear()
+        self.enemy_bullets.clear()
+        self.particles.clear()
         self.boss = None
         
         self.enemy_spawn_timer = 0
         self.powerup_spawn_timer = 0
         self.wave = 1
+        self.wave_plan = self.campaign.wave(1)
         self.enemies_killed = 0
         self.boss_spawned = False
+        self.boss_spawn_tick = 0
+        self.boss_kill_times = []
+        self.tick = 0
+        
+    def snapshot(self):
+        # Complete state, RNG included, as compact versioned bytes
+        return save_snapshot(self)
+        
+    def restore(self, data):
+        load_snapshot(self, data, Player, Enemy, Boss, PowerUp)
+        
+    def pool_stats(self):
+        if self.vectorized:
+            return {}
+        return {"bullets": self.bullet_pool.stats(), "particles": self.particle_pool.stats()}
+        
+    @property
+    def game_over(self):
+        return all(player.health <= 0 for player in self.players)
+        
+    def live_players(self):
+        # A lone player is always simulated; in co-op, downed ships sit out
+        players = self.players
+        if len(players) == 1:
+            return players
+        return [player for player in players if player.health > 0] or players[:1]
+        
+    def nearest_player(self, x, live):
+        if len(live) == 1:
+            return live[0]
+        return min(live, key=lambda player: abs(player.x - x))
+        
+    def checksum(self):
+        # CRC of the gameplay-relevant state, compared tick by tick in replays. Particles are
+        # cosmetic and capped by the particle budget, which replays do not record, so they
+        # are left out; the budget never shifts the RNG stream (see create_explosion)
+        player = self.player
+        values = array("d", (self.tick, self.wave, self.enemies_killed,
+                             player.x, player.y, player.health, player.shield,
+                             player.score, player.power_level, player.weapon_cooldown,
+                             len(self.bullets), len(self.enemy_bullets), len(self.powerups)))
+        for other in self.players[1:]:
+            values.extend((other.x, other.y, other.health, other.shield,
+                           other.power_level, other.weapon_cooldown))
+        if self.vectorized:
+            values.frombytes(self.enemies.checksum_rows())
+        else:
+            for enemy in self.enemies:
+                values.extend((enemy.x, enemy.y, enemy.health, enemy.shoot_cooldown))
+        for powerup in self.powerups:
+            values.extend((powerup.x, powerup.y))
+        if self.boss:
+            values.extend((self.boss.x, self.boss.y, self.boss.health, self.boss.shoot_cooldown))
+        return zlib.crc32(values.tobytes())
         
-    def load_high_score(self):
-        try:
-            with open("high_score.json", "r") as f:
-                data = json.load(f)
-                return data.get("high_score", 0)
-        except FileNotFoundError:
-            return 0
-            
-    def save_high_score(self):
-        with open("high_score.json", "w") as f:
-            json.dump({"high_score": self.high_score}, f)
-    
     def spawn_enemy(self):
-        x = random.randint(50, SCREEN_WIDTH - 50)
-        enemy_type = "smart" if random.random() < 0.3 else "basic"
-        self.enemies.append(Enemy(x, -20, enemy_type))
+        x = self.rng.randint(50, SCREEN_WIDTH - 50)
+        archetype = self.wave_plan.pick(self.rng.random())
+        self.enemies.append(Enemy(x, -20, archetype.name, self.rng, archetype))
         
     def spawn_powerup(self):
-        x = random.randint(50, SCREEN_WIDTH - 50)
+        x = self.rng.randint(50, SCREEN_WIDTH - 50)
         power_types = ["health", "shield", "weapon", "score"]
-        power_type = random.choice(power_types)
+        power_type = self.rng.choice(power_types)
         self.powerups.append(PowerUp(x, -20, power_type))
         
     def create_explosion(self, x, y, color, count=10):
-        for _ in range(count):
-            vel_x = random.uniform(-5, 5)
-            vel_y = random.uniform(-5, 5)
-            self.particles.append(Particle(x, y, color, (vel_x, vel_y)))
+        if self.explosion_log is not None:
+            self.explosion_log.append((x, y, color, count))
+        particles = self.particles
+        overflow = len(particles) + count - self.particle_budget
+        if overflow > 0:
+            self.drop_oldest_particles(min(overflow, len(particles)))
+        room = self.particle_budget - len(particles)
+        
+        # Velocities are drawn even for skipped particles so the budget never shifts the RNG stream
+        for i in range(count):
+            vel_x = self.rng.uniform(-5, 5)
+            vel_y = self.rng.uniform(-5, 5)
+            if i < room:
+                particles.spawn(x, y, vel_x, vel_y, color)
+                
+    def drop_oldest_particles(self, count):
+        particles = self.particles
+        if self.vectorized:
+            particles.drop_oldest(count)
+        else:
+            particles.discard(heapq.nsmallest(count, range(len(particles)),
+                                              key=lambda i: particles[i].lifetime))
     
     def check_collisions(self):
+        grid = self.collision_grid
+        
         # Player bullets vs enemies
-        for bullet in self.bullets[:]:
-            for enemy in self.enemies[:]:
-                distance = math.sqrt((bullet.x - enemy.x)**2 + (bullet.y - enemy.y)**2)
-                if distance < bullet.radius + enemy.radius:
-                    self.bullets.remove(bullet)
+        enemies = self.enemies
+        if self.vectorized:
+            targets = enemies.circles()
+        else:
+            targets = [(enemy.x, enemy.y, enemy.radius) for enemy in enemies]
+        grid.clear()
+        for i, (x, y, radius) in enumerate(targets):
+            grid.insert(i, x, y, radius)
+        if self.boss:
+            grid.insert(BOSS_KEY, self.boss.x, self.boss.y, self.boss.radius)
+            
+        continuous = self.continuous
+        if self.vectorized:
+            bullet_radius = self.bullets.radius
+            bullet_paths = self.bullets.paths() if continuous else self.bullets.points()
+        else:
+            bullet_radius = BULLET_RADIUS
+            if continuous:
+                bullet_paths = [(bullet.x, bullet.y, bullet.vel_x, bullet.vel_y) for bullet in self.bullets]
+            else:
+                bullet_paths = [(bullet.x, bullet.y) for bullet in self.bullets]
+            
+        spent_bullets = set()
+        dead_enemies = set()
+        if targets:
+            for b, path in enumerate(bullet_paths):
+                if continuous:
+                    i, hit_x, hit_y = self.first_impact(grid, path, bullet_radius, dead_enemies, targets)
+                    if i is None:
+                        continue
+                else:
+                    bx, by = path
+                    for i in sorted(grid.query(bx, by, bullet_radius)):
+                        if i == BOSS_KEY or i in dead_enemies:
+                            continue
+                        x, y, radius = targets[i]
+                        dx = bx - x
+                        dy = by - y
+                        reach = bullet_radius + radius
+                        if dx*dx + dy*dy < reach*reach:
+                            hit_x = x
+                            hit_y = y
+                            break
+                    else:
+                        continue
+                spent_bullets.add(b)
+                if self.vectorized:
+                    archetype = enemies.archetypes[enemies.code[i]]
+                    enemies.health[i] -= 10
+                    health = enemies.health[i]
+                else:
+                    enemy = enemies[i]
+                    archetype = enemy.archetype
                     enemy.health -= 10
-                    self.create_explosion(enemy.x, enemy.y, enemy.color, 5)
-                    if enemy.health <= 0:
-                        self.enemies.remove(enemy)
-                        self.enemies_killed += 1
-                        self.player.score += 10 if enemy.enemy_type == "basic" else 25
-                        self.create_explosion(enemy.x, enemy.y, enemy.color, 15)
-                    break
-                    
+                    health = enemy.health
+                self.create_explosion(hit_x, hit_y, archetype.color, 5)
+                if health <= 0:
+                    dead_enemies.add(i)
+                    self.enemies_killed += 1
+                    self.player.score += archetype.score
+                    x, y, _ = targets[i]
+                    self.create_explosion(x, y, archetype.color, 15)
+                        
         # Player bullets vs boss
         if self.boss:
-            for bullet in self.bullets[:]:
-                distance = math.sqrt((bullet.x - self.boss.x)**2 + (bullet.y - self.boss.y)**2)
-                if distance < bullet.radius + self.boss.radius:
-                    self.bullets.remove(bullet)
-                    self.boss.health -= 10
-                    self.create_explosion(self.boss.x, self.boss.y, RED, 8)
-                    if self.boss.health <= 0:
-                        self.player.score += 100
-                        self.create_explosion(self.boss.x, self.boss.y, RED, 30)
-                        self.boss = None
-                        self.boss_spawned = False
-                        self.wave += 1
+            boss = self.boss
+            reach = bullet_radius + boss.radius
+            for b, path in enumerate(bullet_paths):
+                if b in spent_bullets:
+                    continue
+                if continuous:
+                    bx, by, vx, vy = path
+                    if BOSS_KEY not in grid.query_swept(bx - vx, by - vy, bx, by, bullet_radius):
+                        continue
+                    t = sweep_circle(bx - vx, by - vy, vx, vy, boss.x, boss.y, reach)
+                    if t is None:
+                        continue
+                    hit_x = bx - vx * (1 - t)
+                    hit_y = by - vy * (1 - t)
+                else:
+                    bx, by = path
+                    if BOSS_KEY not in grid.query(bx, by, bullet_radius):
+                        continue
+                    dx = bx - boss.x
+                    dy = by - boss.y
+                    if dx*dx + dy*dy >= reach*reach:
+                        continue
+                    hit_x = boss.x
+                    hit_y = boss.y
+                spent_bullets.add(b)
+                boss.health -= 10
+                self.create_explosion(hit_x, hit_y, RED, 8)
+                if boss.health <= 0:
+                    self.player.score += 100
+                    self.create_explosion(boss.x, boss.y, RED, 30)
+                    self.boss = None
+                    self.boss_spawned = False
+                    self.boss_kill_times.append(self.tick - self.boss_spawn_tick)
+                    self.wave += 1
+                    self.wave_plan = self.campaign.wave(self.wave)
+                    break
+                    
+        if dead_enemies:
+            self.discard(enemies, dead_enemies)
+        if spent_bullets:
+            self.discard(self.bullets, spent_bullets)
+            
+        for player in self.live_players():
+            self.collide_player(player)
+            
+    def collide_player(self, player):
+        # One ship against everything: a direct scan is cheaper than filling the spatial hash
+        # for a single query, so the hash is kept for the many-vs-many bullets-vs-enemies pass
+        px = player.x
+        py = player.y
         
         # Enemy bullets vs player
-        for bullet in self.enemy_bullets[:]:
-            distance = math.sqrt((bullet.x - self.player.x)**2 + (bullet.y - self.player.y)**2)
-            if distance < bullet.radius + self.player.radius:
-                self.enemy_bullets.remove(bullet)
-                if self.player.shield > 0:
-                    self.player.shield -= 10
-                else:
-                    self.player.health -= 10
-                self.create_explosion(self.player.x, self.player.y, RED, 5)
-                
+        if self.continuous:
+            impacts = self.player_impacts(player)
+            hits = [i for i, _, _ in impacts]
+        elif self.vectorized:
+            hits = self.enemy_bullets.overlapping(px, py, player.radius)
+            impacts = [(i, px, py) for i in hits]
+        else:
+            reach = BULLET_RADIUS + player.radius
+            reach2 = reach * reach
+            hits = [i for i, bullet in enumerate(self.enemy_bullets)
+                    if (bullet.x - px) ** 2 + (bullet.y - py) ** 2 < reach2]
+            impacts = [(i, px, py) for i in hits]
+        for _, hit_x, hit_y in impacts:
+            if player.shield > 0:
+                player.shield -= 10
+            else:
+                player.health -= 10
+            self.create_explosion(hit_x, hit_y, RED, 5)
+        if hits:
+            self.discard(self.enemy_bullets, hits)
+            
         # Enemies vs player
-        for enemy in self.enemies[:]:
-            distance = math.sqrt((enemy.x - self.player.x)**2 + (enemy.y - self.player.y)**2)
-            if distance < enemy.radius + self.player.radius:
-                self.enemies.remove(enemy)
-                if self.player.shield > 0:
-                    self.player.shield -= 20
-                else:
-                    self.player.health -= 20
-                self.create_explosion(self.player.x, self.player.y, RED, 10)
+        if self.vectorized:
+            hits = self.enemies.overlapping(px, py, player.radius)
+        else:
+            hits = []
+            for i, enemy in enumerate(self.enemies):
+                dx = enemy.x - px
+                dy = enemy.y - py
+                reach = enemy.radius + player.radius
+                if dx*dx + dy*dy < reach*reach:
+                    hits.append(i)
+        for _ in hits:
+            if player.shield > 0:
+                player.shield -= 20
+            else:
+                player.health -= 20
+            self.create_explosion(px, py, RED, 10)
+        if hits:
+            self.discard(self.enemies, hits)
                 
         # Boss vs player
         if self.boss:
-            distance = math.sqrt((self.boss.x - self.player.x)**2 + (self.boss.y - self.player.y)**2)
-            if distance < self.boss.radius + self.player.radius:
-                if self.player.shield > 0:
-                    self.player.shield -= 30
+            dx = self.boss.x - player.x
+            dy = self.boss.y - player.y
+            reach = self.boss.radius + player.radius
+            if dx*dx + dy*dy < reach*reach:
+                if player.shield > 0:
+                    player.shield -= 30
                 else:
-                    self.player.health -= 30
-                self.create_explosion(self.player.x, self.player.y, RED, 15)
+                    player.health -= 30
+                self.create_explosion(player.x, player.y, RED, 15)
         
         # PowerUps vs player
-        for powerup in self.powerups[:]:
-            distance = math.sqrt((powerup.x - self.player.x)**2 + (powerup.y - self.player.y)**2)
-            if distance < powerup.radius + self.player.radius:
-                self.powerups.remove(powerup)
+        hits = set()
+        for i, powerup in enumerate(self.powerups):
+            dx = powerup.x - player.x
+            dy = powerup.y - player.y
+            reach = powerup.radius + player.radius
+            if dx*dx + dy*dy < reach*reach:
+                hits.add(i)
                 if powerup.power_type == "health":
-                    self.player.health = min(self.player.max_health, self.player.health + 30)
+                    player.health = min(player.max_health, player.health + 30)
                 elif powerup.power_type == "shield":
-                    self.player.shield = min(100, self.player.shield + 50)
+                    player.shield = min(100, player.shield + 50)
                 elif powerup.power_type == "weapon":
-                    self.player.power_level = min(3, self.player.power_level + 1)
+                    player.power_level = min(3, player.power_level + 1)
                 elif powerup.power_type == "score":
                     self.player.score += 50
                 self.create_explosion(powerup.x, powerup.y, powerup.colors[powerup.power_type], 8)
+        if hits:
+            self.powerups[:] = [p for i, p in enumerate(self.powerups) if i not in hits]
     
-    def update(self):
-        self.player.update()
+    def first_impact(self, grid, path, radius, skip, targets):
+        # Earliest enemy along a bullet's last tick of motion: (index, impact x, impact y);
+        # targets holds each enemy's (x, y, radius)
+        x, y, vel_x, vel_y = path
+        x0 = x - vel_x
+        y0 = y - vel_y
+        best = None
+        best_t = 2
+        for i in grid.query_swept(x0, y0, x, y, radius):
+            if i == BOSS_KEY or i in skip:
+                continue
+            target_x, target_y, target_radius = targets[i]
+            t = sweep_circle(x0, y0, vel_x, vel_y, target_x, target_y, radius + target_radius)
+            if t is not None and (t < best_t or t == best_t and i < best):
+                best = i
+                best_t = t
+        if best is None:
+            return None, x, y
+        return best, x0 + vel_x * best_t, y0 + vel_y * best_t
+        
+    def player_impacts(self, player):
+        # Enemy bullets whose last tick of motion crossed the player: (index, impact x, impact y)
+        px = player.x
+        py = player.y
+        if self.vectorized:
+            store = self.enemy_bullets
+            impacts = []
+            for i, t in store.swept(px, py, player.radius):
+                back = 1 - t
+                impacts.append((i, float(store.x[i] - store.vel_x[i] * back),
+                                float(store.y[i] - store.vel_y[i] * back)))
+            return impacts
+        impacts = []
+        reach = BULLET_RADIUS + player.radius
+        for i, bullet in enumerate(self.enemy_bullets):
+            x = bullet.x
+            y = bullet.y
+            if bullet.fresh:
+                # Fired this tick from where it stands, so there is no path behind it to test
+                if (x - px) ** 2 + (y - py) ** 2 < reach * reach:
+                    impacts.append((i, x, y))
+                continue
+            vel_x = bullet.vel_x
+            vel_y = bullet.vel_y
+            # Cheap reject: the player is outside the box around this tick's path
+            if abs(x - px) > reach + abs(vel_x) or abs(y - py) > reach + abs(vel_y):
+                continue
+            t = sweep_circle(x - vel_x, y - vel_y, vel_x, vel_y, px, py, reach)
+            if t is not None:
+                back = 1 - t
+                impacts.append((i, x - vel_x * back, y - vel_y * back))
+        return impacts
         
-        # Shooting
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_SPACE]:
-            self.player.shoot(self.bullets)
+    def discard(self, entities, indices):
+        if hasattr(entities, "discard"):
+            entities.discard(indices)
+        else:
+            indices = set(indices)
+            entities[:] = [e for i, e in enumerate(entities) if i not in indices]
+    
+    def update(self, controls=IDLE_INPUT):
+        prof = self.profiler
+        if prof:
+            t = perf_counter_ns()
+        self.tick += 1
+        # Co-op takes one InputState per player
+        if isinstance(controls, InputState):
+            controls = (controls,)
+        live = self.live_players()
+        for i, player in enumerate(self.players):
+            if player not in live:
+                continue
+            player_controls = controls[i] if i < len(controls) else IDLE_INPUT
+            player.update(player_controls)
+            
+            # Shooting
+            if player_controls.shoot:
+                player.shoot(self.bullets)
+        if prof:
+            t = prof.lap("player", t)
             
         # Update bullets
-        for bullet in self.bullets[:]:
-            bullet.update()
-            if bullet.y < 0 or bullet.y > SCREEN_HEIGHT:
-                self.bullets.remove(bullet)
-                
-        for bullet in self.enemy_bullets[:]:
-            bullet.update()
-            if bullet.y < 0 or bullet.y > SCREEN_HEIGHT or bullet.x < 0 or bullet.x > SCREEN_WIDTH:
-                self.enemy_bullets.remove(bullet)
+        if self.vectorized:
+            self.bullets.update()
+            self.bullets.cull_outside(-math.inf, 0, math.inf, SCREEN_HEIGHT)
+            self.enemy_bullets.update()
+            self.enemy_bullets.cull_outside(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        else:
+            # Swap-and-pop drops land an unvisited bullet at i, so i only advances on keeps
+            bullets = self.bullets
+            i = 0
+            while i < len(bullets):
+                bullet = bullets[i]
+                bullet.update()
+                if bullet.y < 0 or bullet.y > SCREEN_HEIGHT:
+                    bullets.swap_remove(i)
+                else:
+                    i += 1
+                    
+            bullets = self.enemy_bullets
+            i = 0
+            while i < len(bullets):
+                bullet = bullets[i]
+                bullet.update()
+                if bullet.y < 0 or bullet.y > SCREEN_HEIGHT or bullet.x < 0 or bullet.x > SCREEN_WIDTH:
+                    bullets.swap_remove(i)
+                else:
+                    i += 1
+        
+        if prof:
+            t = prof.lap("bullets", t)
         
         # Update enemies
-        for enemy in self.enemies[:]:
-            enemy.update(self.player, self.enemy_bullets)
-            if enemy.y > SCREEN_HEIGHT:
-                self.enemies.remove(enemy)
+        if self.vectorized:
+            self.enemies.update(live, self.enemy_bullets, self.rng)
+        else:
+            for enemy in self.enemies[:]:
+                enemy.update(self.nearest_player(enemy.x, live), self.enemy_bullets)
+                if enemy.y > SCREEN_HEIGHT:
+                    self.enemies.remove(enemy)
+                
+        if prof:
+            t = prof.lap("enemies", t)
                 
         # Update boss
         if self.boss:
-            self.boss.update(self.player, self.enemy_bullets)
+            self.boss.update(self.nearest_player(self.boss.x, live), self.enemy_bullets)
+        if prof:
+            t = prof.lap("boss", t)
             
         # Update powerups
         for powerup in self.powerups[:]:
             powerup.update()
             if powerup.y > SCREEN_HEIGHT:
                 self.powerups.remove(powerup)
+        if prof:
+            t = prof.lap("powerups", t)
                 
-        # Update particles
-        for particle in self.particles[:]:
-            particle.update()
-            if particle.lifetime <= 0:
-                self.particles.remove(particle)
+        self.update_particles()
+        if prof:
+            t = prof.lap("particles", t)
         
         # Spawn enemies
         self.enemy_spawn_timer -= 1
         if self.enemy_spawn_timer <= 0 and not self.boss:
             self.spawn_enemy()
-            self.enemy_spawn_timer = max(30, 120 - self.wave * 10)
+            self.enemy_spawn_timer = self.wave_plan.spawn_interval
             
         # Spawn powerups
         self.powerup_spawn_timer -= 1
         if self.powerup_spawn_timer <= 0:
-            if random.random() < 0.3:
+            if self.rng.random() < POWERUP_CHANCE:
                 self.spawn_powerup()
-            self.powerup_spawn_timer = random.randint(300, 600)
+            self.powerup_spawn_timer = self.rng.randint(300, 600)
             
         # Spawn boss
-        if self.enemies_killed >= self.wave * 10 and not self.boss_spawned and not self.boss:
-            self.boss = Boss(SCREEN_WIDTH // 2, 100)
+        if self.enemies_killed >= self.wave_plan.kill_target and not self.boss_spawned and not self.boss:
+            self.boss = Boss(SCREEN_WIDTH // 2, 100, self.rng)
             self.boss_spawned = True
+            self.boss_spawn_tick = self.tick
             self.enemies.clear()  # Clear remaining enemies
+        if prof:
+            t = prof.lap("spawning", t)
         
         self.check_collisions()
         
         # Update high score
         if self.player.score > self.high_score:
             self.high_score = self.player.score
-    
-    def draw(self):
-        self.screen.fill(BLACK)
+        if prof:
+            prof.lap("collisions", t)
+            
+    def update_particles(self):
+        if self.vectorized:
+            self.particles.update()
+        else:
+            particles = self.particles
+            i = 0
+            while i < len(particles):
+                particle = particles[i]
+                particle.update()
+                if particle.lifetime <= 0:
+                    particles.swap_remove(i)
+                else:
+                    i += 1
+                    
+    def run(self, policy, max_ticks=None):
+        # Step as fast as possible until the player dies or max_ticks elapse
+        while not self.game_over and (max_ticks is None or self.tick < max_ticks):
+            self.update(policy(self))
+        return self.tick
+
+class Game:
+    # Pygame front end: turns keyboard state into InputState and renders a Simulation
+    def __init__(self, vectorized=False, record=None, seed=None, dirty_rects=False,
+                 profile=False, profile_trace=None, particle_budget=PARTICLE_BUDGET,
+                 player="default", campaign=None, continuous=False, players=1, threaded=False,
+                 data_dir=DATA_DIR):
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Space Explorer - Built with Amazon Q CLI")
+        self.clock = pygame.time.Clock()
+        self.fonts = {}
+        self.sprites = SpriteCache()
+        self.text = TextCache()
+        self.overlay = None
+        self.previous = {}
+        self.starfield = None
+        self.quicksave = None
+        # Which ship the HUD follows, and extra HUD lines (netplay puts its stats here)
+        self.player_index = 0
+        self.status_lines = []
+        self.particle_renderer = ParticleRenderer()
+        # Threaded mode ticks the simulation on its own thread (see sim_thread.py)
+        self.threaded = threaded
+        self.dirty = DirtyRectTracker((SCREEN_WIDTH, SCREEN_HEIGHT)) if dirty_rects else None
         
-        # Draw stars background
-        for i in range(50):
-            x = (i * 23) % SCREEN_WIDTH
-            y = (i * 17 + pygame.time.get_ticks() // 50) % SCREEN_HEIGHT
-            pygame.draw.circle(self.screen, WHITE, (x, y), 1)
+        # Load high score
+        self.store = PersistenceService(player, data_dir)
+        self.sim = Simulation(vectorized, self.store.high_score(), seed, particle_budget,
+                              load_campaign(campaign) if campaign else None, continuous, players)
         
-        # Draw game objects
-        self.player.draw(self.screen)
+        # The profiler only exists while its overlay is shown or a trace is being written
+        self.profile_trace = profile_trace
+        self.show_profiler = False
+        self.profiler = None
+        if profile or profile_trace:
+            self.toggle_profiler(show=profile)
         
-        for bullet in self.bullets:
-            bullet.draw(self.screen)
-            
-        for bullet in self.enemy_bullets:
-            bullet.draw(self.screen)
-            
-        for enemy in self.enemies:
-            enemy.draw(self.screen)
+        # Only the first run is recorded; restarts play unrecorded
+        self.recorder = None
+        if record:
+            from replay import ReplayWriter
+            # The campaign's source goes into the replay, so it verifies without the file
+            source = b""
+            if campaign:
+                with open(campaign, "rb") as f:
+                    source = f.read()
+            self.recorder = ReplayWriter(record, self.sim.seed, source)
+        
+    def load_font(self, size):
+        # The font subsystem and each font load on first use
+        font = self.fonts.get(size)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+        
+    @property
+    def font(self):
+        return self.load_font(36)
+        
+    @property
+    def small_font(self):
+        return self.load_font(24)
+        
+    def save_run(self):
+        # Queued for the persistence thread; nothing here touches the disk
+        sim = self.sim
+        self.store.record_run({
+            "score": sim.player.score,
+            "wave": sim.wave,
+            "duration": sim.tick / FPS,
+            "seed": sim.seed,
+            "finished_at": time.time(),
+        })
             
-        if self.boss:
-            self.boss.draw(self.screen)
+    def update(self, controls=None):
+        if controls is None:
+            controls = InputState.from_keys(pygame.key.get_pressed())
+        self.sim.update(controls)
+        if self.recorder:
+            self.recorder.write_tick(controls.to_bits(), self.sim.checksum())
             
-        for powerup in self.powerups:
-            powerup.draw(self.screen)
+    def toggle_profiler(self, show=None):
+        self.show_profiler = not self.show_profiler if show is None else show
+        if self.profiler is None and (self.show_profiler or self.profile_trace):
+            self.profiler = FrameProfiler(trace_path=self.profile_trace)
+        elif self.profiler and not self.show_profiler and not self.profile_trace:
+            self.profiler.close()
+            self.profiler = None
+        # The profiler is not thread safe, so a threaded run only times the render side
+        self.sim.profiler = None if self.threaded else self.profiler
+        if self.dirty:
+            self.dirty.invalidate()
             
-        for particle in self.particles:
-            particle.draw(self.screen)
-        
-        # Draw UI
-        score_text = self.font.render(f"Score: {self.player.score}", True, WHITE)
-        self.screen.blit(score_text, (10, 10))
+    def stop_recording(self):
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+    
+    def remember_positions(self):
+        # Taken before each tick so draw() can interpolate towards the new state
+        sim = self.sim
+        previous = {player: (player.x, player.y) for player in sim.players}
+        if not sim.vectorized:
+            # A Swarm keeps its own previous positions
+            for enemy in sim.enemies:
+                previous[enemy] = (enemy.x, enemy.y)
+        for powerup in sim.powerups:
+            previous[powerup] = (powerup.x, powerup.y)
+        if sim.boss:
+            previous[sim.boss] = (sim.boss.x, sim.boss.y)
+        self.previous = previous
         
-        high_score_text = self.small_font.render(f"High Score: {self.high_score}", True, WHITE)
-        self.screen.blit(high_score_text, (10, 50))
+    def draw_lerped(self, entity, alpha, previous=None):
+        # Draw at the blend of the last two tick positions, then put the real position back
+        if previous is None:
+            previous = self.previous.get(entity)
+        if previous is None or alpha >= 1:
+            return entity.draw(self.screen, self.sprites)
+        x, y = entity.x, entity.y
+        entity.x = previous[0] + (x - previous[0]) * alpha
+        entity.y = previous[1] + (y - previous[1]) * alpha
+        try:
+            return entity.draw(self.screen, self.sprites)
+        finally:
+            entity.x, entity.y = x, y
+    
+    def draw_bullet_rows(self, bullets, alpha):
+        # A snapshot's list-mode bullets, blitted in one batch with the sprites Bullet.draw uses
+        back = 1 - alpha
+        sprites = {}
+        batch = []
+        for x, y, vel_x, vel_y, color in bullets.rows:
+            entry = sprites.get(color)
+            if entry is None:
+                entry = sprites[color] = self.sprites.get(Bullet(0, 0, 0, 0, color))
+            surface, half = entry
+            batch.append((surface, (int(x - vel_x * back) - half, int(y - vel_y * back) - half)))
+        rects = self.screen.blits(batch, self.dirty is not None)
+        if self.dirty:
+            self.dirty.extend(rects)
+    
+    def draw_swarm(self, enemies, alpha):
+        # Vectorized enemies in batched blits with Enemy.draw's sprites; a health bar goes
+        # on top of its own enemy, so the batch is flushed before each one
+        sprites = []
+        for archetype in enemies.archetypes:
+            body = Enemy.__new__(Enemy)
+            body.color = archetype.color
+            body.radius = archetype.radius
+            sprites.append(self.sprites.get(body))
+        bars = [archetype.health_bar for archetype in enemies.archetypes]
+        screen = self.screen
+        dirty = self.dirty
+        batch = []
+        for x, y, code, health, max_health in enemies.rows(alpha):
+            surface, half = sprites[code]
+            batch.append((surface, (int(x) - half, int(y) - half)))
+            if bars[code]:
+                rects = screen.blits(batch, dirty is not None)
+                if dirty:
+                    dirty.extend(rects)
+                batch = []
+                bar_x = x - 15
+                bar_y = y - enemies.archetypes[code].radius - 8
+                rect = pygame.draw.rect(screen, RED, (bar_x, bar_y, 30, 4))
+                pygame.draw.rect(screen, GREEN, (bar_x, bar_y, int(30 * (health / max_health)), 4))
+                if dirty:
+                    dirty.add(rect)
+        rects = screen.blits(batch, dirty is not None)
+        if dirty:
+            dirty.extend(rects)
+    
+    def draw(self, alpha=1.0, view=None):
+        # view is a RenderSnapshot in threaded mode, otherwise the live Simulation is drawn
+        sim = self.sim if view is None else view
+        screen = self.screen
+        dirty = self.dirty
+        prof = self.profiler
+        if prof:
+            t = perf_counter_ns()
         
-        wave_text = self.font.render(f"Wave: {self.wave}", True, WHITE)
-        self.screen.blit(wave_text, (10, 80))
+        # Draw stars background; it holds still in dirty-rect mode, where a
+        # scrolling backdrop would dirty the whole screen every frame
+        if self.starfield is None:
+            self.starfield = Starfield(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.starfield.draw(screen, 0 if dirty else sim.tick - 1 + alpha)
         
-        health_text = self.font.render(f"Health: {self.player.health}", True, WHITE)
-        self.screen.blit(health_text, (SCREEN_WIDTH - 200, 10))
+        # Draw game objects
+        for player in sim.live_players():
+            rect = self.draw_lerped(player, alpha)
+            if dirty:
+                dirty.add(rect)
         
-        if self.player.shield > 0:
-            shield_text = self.font.render(f"Shield: {self.player.shield}", True, CYAN)
-            self.screen.blit(shield_text, (SCREEN_WIDTH - 200, 50))
+        if sim.vectorized:
+            sim.bullets.draw(screen, dirty, alpha)
+            sim.enemy_bullets.draw(screen, dirty, alpha)
+        elif view is not None:
+            self.draw_bullet_rows(sim.bullets, alpha)
+            self.draw_bullet_rows(sim.enemy_bullets, alpha)
+        else:
+            for bullet in sim.bullets:
+                rect = self.draw_lerped(bullet, alpha, (bullet.x - bullet.vel_x, bullet.y - bullet.vel_y))
+                if dirty:
+                    dirty.add(rect)
+                
+            for bullet in sim.enemy_bullets:
+                rect = self.draw_lerped(bullet, alpha, (bullet.x - bullet.vel_x, bullet.y - bullet.vel_y))
+                if dirty:
+                    dirty.add(rect)
             
-        power_text = self.small_font.render(f"Weapon Level: {self.player.power_level}", True, YELLOW)
-        self.screen.blit(power_text, (SCREEN_WIDTH - 200, 90))
+        if sim.vectorized:
+            self.draw_swarm(sim.enemies, alpha)
+        else:
+            for enemy in sim.enemies:
+                rect = self.draw_lerped(enemy, alpha)
+                if dirty:
+                    dirty.add(rect)
+            
+        if sim.boss:
+            rect = self.draw_lerped(sim.boss, alpha)
+            if dirty:
+                dirty.add(rect)
+            
+        for powerup in sim.powerups:
+            rect = self.draw_lerped(powerup, alpha)
+            if dirty:
+                dirty.add(rect)
+            
+        self.particle_renderer.draw(screen, sim.particles, dirty, alpha)
+        
+        # Draw UI; the score is shared, the rest belongs to the local ship
+        local = sim.players[self.player_index]
+        hud = [
+            (self.font, f"Score: {sim.player.score}", WHITE, (10, 10)),
+            (self.small_font, f"High Score: {sim.high_score}", WHITE, (10, 50)),
+            (self.font, f"Wave: {sim.wave}", WHITE, (10, 80)),
+            (self.font, f"Health: {local.health}", WHITE, (SCREEN_WIDTH - 200, 10)),
+            (self.font, f"Shield: {local.shield}" if local.shield > 0 else "", CYAN, (SCREEN_WIDTH - 200, 50)),
+            (self.small_font, f"Weapon Level: {local.power_level}", YELLOW, (SCREEN_WIDTH - 200, 90)),
+        ]
+        for i, line in enumerate(self.status_lines):
+            hud.append((self.small_font, line, WHITE, (10, 120 + i * 20)))
         
         # Draw controls
         controls = [
             "WASD/Arrow Keys: Move",
             "Space: Shoot",
+            "F3: Profiler",
+            "F5/F9: Quicksave/load",
             "ESC: Quit"
         ]
         for i, control in enumerate(controls):
-            text = self.small_font.render(control, True, WHITE)
-            self.screen.blit(text, (SCREEN_WIDTH - 200, SCREEN_HEIGHT - 80 + i * 20))
+            hud.append((self.small_font, control, WHITE, (SCREEN_WIDTH - 200, SCREEN_HEIGHT - 100 + i * 20)))
+            
+        for font, string, color, pos in hud:
+            if not string:
+                if dirty:
+                    dirty.add_hud(pos, None, None)
+                continue
+            text = self.text.render(font, string, color)
+            rect = screen.blit(text, pos)
+            if dirty:
+                dirty.add_hud(pos, text, rect)
         
-        pygame.display.flip()
+        if self.show_profiler:
+            rect = prof.draw(screen, self.small_font)
+            if dirty:
+                dirty.add(rect)
+        if prof:
+            t = prof.lap("draw", t)
+        
+        if dirty:
+            dirty.present()
+        else:
+            pygame.display.flip()
+        if prof:
+            prof.lap("flip", t)
     
     def game_over_screen(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        sim = self.sim
+        if self.overlay is None:
+            self.overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            self.overlay.set_alpha(128)
+            self.overlay.fill(BLACK)
+        self.screen.blit(self.overlay, (0, 0))
         
-        game_over_text = self.font.render("GAME OVER", True, RED)
-        score_text = self.font.render(f"Final Score: {self.player.score}", True, WHITE)
-        high_score_text = self.font.render(f"High Score: {self.high_score}", True, YELLOW)
-        restart_text = self.small_font.render("Press R to Restart or ESC to Quit", True, WHITE)
+        game_over_text = self.text.render(self.font, "GAME OVER", RED)
+        score_text = self.text.render(self.font, f"Final Score: {sim.player.score}", WHITE)
+        high_score_text = self.text.render(self.font, f"High Score: {sim.high_score}", YELLOW)
+        restart_text = self.text.render(self.small_font, "Press R to Restart or ESC to Quit", WHITE)
         
         texts = [game_over_text, score_text, high_score_text, restart_text]
         y_offset = SCREEN_HEIGHT // 2 - 100
@@ -552,34 +1273,190 @@ class Game:
         pygame.display.flip()
     
     def run(self):
+        if self.threaded:
+            return self.run_threaded()
         running = True
         game_over = False
+        accumulator = 0.0
+        last = time.perf_counter()
         
         while running:
+            start = perf_counter_ns()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         running = False
+                    elif event.key == pygame.K_F3:
+                        self.toggle_profiler()
+                    elif event.key == pygame.K_F5 and not game_over:
+                        self.quicksave = self.sim.snapshot()
+                    elif event.key == pygame.K_F9 and self.quicksave:
+                        # A replay cannot represent the jump back, so recording stops here
+                        self.stop_recording()
+                        self.sim.restore(self.quicksave)
+                        self.previous = {}
+                        game_over = False
                     elif event.key == pygame.K_r and game_over:
-                        self.reset_game()
+                        self.sim.reset_game()
+                        self.previous = {}
                         game_over = False
             
+            prof = self.profiler
+            if prof:
+                t = prof.lap("events", start)
+            
+            # Fixed-rate simulation ticks for the wall time that has passed
+            now = time.perf_counter()
+            accumulator += now - last
+            last = now
+            
             if not game_over:
-                if self.player.health <= 0:
+                ticks = 0
+                while accumulator >= TICK_SECONDS and ticks < MAX_TICKS_PER_FRAME:
+                    if self.sim.game_over:
+                        break
+                    self.remember_positions()
+                    self.update()
+                    accumulator -= TICK_SECONDS
+                    ticks += 1
+                if ticks == MAX_TICKS_PER_FRAME:
+                    accumulator = min(accumulator, TICK_SECONDS)
+                if prof:
+                    prof.lap("update", t)
+                    
+                if self.sim.game_over:
                     game_over = True
-                    self.save_high_score()
+                    self.stop_recording()
+                    self.save_run()
                 else:
-                    self.update()
-                    self.draw()
+                    self.draw(min(1.0, accumulator / TICK_SECONDS))
             else:
+                accumulator = 0.0
                 self.game_over_screen()
+                if self.dirty:
+                    self.dirty.invalidate()
             
-            self.clock.tick(FPS)
+            if prof:
+                t = perf_counter_ns()
+            self.clock.tick(FPS if game_over else RENDER_FPS_CAP)
+            if prof:
+                prof.lap("idle", t)
+                prof.record_counts(self.sim)
+                prof.end_frame()
         
+        self.close()
+        
+    def close(self):
+        self.stop_recording()
+        if self.profiler:
+            self.profiler.close()
+        self.store.close()
         pygame.quit()
+        
+    def run_threaded(self):
+        # The main thread only pumps events, samples the keys and draws the newest snapshot;
+        # anything that touches the Simulation is handed to its thread as a command
+        sim = self.sim
+        thread = SimulationThread(self, IDLE_INPUT, TICK_SECONDS, MAX_TICKS_PER_FRAME)
+        
+        def quicksave():
+            self.quicksave = sim.snapshot()
+            
+        def quickload():
+            # A replay cannot represent the jump back, so recording stops here
+            self.stop_recording()
+            sim.restore(self.quicksave)
+            
+        thread.start()
+        running = True
+        game_over = False
+        try:
+            while running:
+                start = perf_counter_ns()
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_ESCAPE:
+                            running = False
+                        elif event.key == pygame.K_F3:
+                            self.toggle_profiler()
+                        elif event.key == pygame.K_F5 and not game_over:
+                            thread.call(quicksave)
+                        elif event.key == pygame.K_F9 and self.quicksave:
+                            thread.call(quickload)
+                        elif event.key == pygame.K_r and game_over:
+                            thread.call(sim.reset_game)
+                if thread.error:
+                    raise thread.error
+                thread.push_input(InputState.from_keys(pygame.key.get_pressed()))
+                
+                prof = self.profiler
+                if prof:
+                    prof.lap("events", start)
+                
+                view = thread.front
+                if view.game_over:
+                    if not game_over:
+                        # The simulation thread stops ticking once the game is over
+                        game_over = True
+                        self.stop_recording()
+                        self.save_run()
+                    self.game_over_screen()
+                    if self.dirty:
+                        self.dirty.invalidate()
+                else:
+                    game_over = False
+                    self.previous = view.previous
+                    self.draw(min(1.0, (time.perf_counter() - view.published) / TICK_SECONDS), view)
+                
+                if prof:
+                    t = perf_counter_ns()
+                self.clock.tick(FPS if game_over else RENDER_FPS_CAP)
+                if prof:
+                    prof.lap("idle", t)
+                    prof.record_counts(view)
+                    prof.end_frame()
+        finally:
+            thread.stop()
+        self.close()
+
+def seed_arg(text):
+    # argparse type for --seed: replays, snapshots and netplay store the seed as a u64
+    seed = int(text)
+    if not 0 <= seed < 2 ** 64:
+        raise argparse.ArgumentTypeError(f"seed must be between 0 and {2 ** 64 - 1}")
+    return seed
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Space Explorer")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="store bullets and particles in NumPy arrays")
+    parser.add_argument("--seed", type=seed_arg, help="seed for a reproducible run")
+    parser.add_argument("--record", metavar="PATH",
+                        help="write a replay of the first run to PATH")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only push changed screen regions instead of flipping every frame")
+    parser.add_argument("--profile", action="store_true",
+                        help="start with the frame profiler overlay shown (toggle with F3)")
+    parser.add_argument("--profile-trace", metavar="PATH",
+                        help="write per-frame timings to PATH (.csv, otherwise JSON Lines)")
+    parser.add_argument("--particle-budget", type=int, default=PARTICLE_BUDGET,
+                        help="maximum live particles; the oldest are dropped first")
+    parser.add_argument("--player", default="default",
+                        help="profile name for the leaderboard and run history")
+    parser.add_argument("--campaign", metavar="PATH",
+                        help="JSON file of enemy archetypes and waves (default: built-in)")
+    parser.add_argument("--ccd", action="store_true",
+                        help="continuous collision detection, so fast bullets cannot pass through targets")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run the simulation on its own thread so slow frames do not delay ticks")
+    args = parser.parse_args()
+    game = Game(vectorized=args.vectorized, record=args.record, seed=args.seed,
+                dirty_rects=args.dirty_rects, profile=args.profile,
+                profile_trace=args.profile_trace, particle_budget=args.particle_budget,
+                player=args.player, campaign=args.campaign,
+                continuous=args.ccd, threaded=args.threaded)
     game.run()
@@ -0,0 +1,98 @@
+# Uniform-grid spatial hash used as the collision broad phase, plus the swept-circle narrow phase
+import math
+
+
+class SpatialHash:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def clear(self):
+        self.cells.clear()
+
+    def _cell_range(self, x, y, radius):
+        size = self.cell_size
+        return (int((x - radius) // size), int((x + radius) // size),
+                int((y - radius) // size), int((y + radius) // size))
+
+    def insert(self, key, x, y, radius):
+        # Register the key in every cell its bounding box overlaps
+        x0, x1, y0, y1 = self._cell_range(x, y, radius)
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [key]
+                else:
+                    bucket.append(key)
+
+    def query(self, x, y, radius):
+        # Keys whose bounding boxes share a cell with the query box
+        x0, x1, y0, y1 = self._cell_range(x, y, radius)
+        cells = self.cells
+        if x0 == x1 and y0 == y1:
+            return set(cells.get((x0, y0), ()))
+        found = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+    def insert_swept(self, key, x0, y0, x1, y1, radius):
+        # Register a circle moving from (x0, y0) to (x1, y1) under its swept bounding box
+        cx = (x0 + x1) * 0.5
+        cy = (y0 + y1) * 0.5
+        self._insert_box(key, cx, cy, abs(x1 - x0) * 0.5 + radius, abs(y1 - y0) * 0.5 + radius)
+
+    def query_swept(self, x0, y0, x1, y1, radius):
+        cx = (x0 + x1) * 0.5
+        cy = (y0 + y1) * 0.5
+        return self._query_box(cx, cy, abs(x1 - x0) * 0.5 + radius, abs(y1 - y0) * 0.5 + radius)
+
+    def _box_range(self, x, y, half_w, half_h):
+        size = self.cell_size
+        return (int((x - half_w) // size), int((x + half_w) // size),
+                int((y - half_h) // size), int((y + half_h) // size))
+
+    def _insert_box(self, key, x, y, half_w, half_h):
+        x0, x1, y0, y1 = self._box_range(x, y, half_w, half_h)
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [key]
+                else:
+                    bucket.append(key)
+
+    def _query_box(self, x, y, half_w, half_h):
+        x0, x1, y0, y1 = self._box_range(x, y, half_w, half_h)
+        cells = self.cells
+        found = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+
+def sweep_circle(x, y, dx, dy, cx, cy, reach):
+    # Earliest t in [0, 1] at which (x, y) + t * (dx, dy) comes within reach of (cx, cy), else None
+    fx = x - cx
+    fy = y - cy
+    c = fx*fx + fy*fy - reach*reach
+    if c < 0:
+        return 0.0
+    b = fx*dx + fy*dy
+    if b >= 0:
+        return None
+    a = dx*dx + dy*dy
+    disc = b*b - a*c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    return t if t <= 1 else None
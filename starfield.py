@@ -0,0 +1,44 @@
+# Multi-layer parallax starfield pre-rendered into tiling surfaces
+import random
+
+from lazy_import import lazy_import
+
+pygame = lazy_import("pygame")
+
+# (star count, pixels scrolled per tick, colour, star size), far layer first
+STAR_LAYERS = (
+    (1400, 0.25, (70, 70, 90), 1),
+    (600, 0.6, (150, 150, 170), 1),
+    (160, 1.2, (255, 255, 255), 2),
+)
+STARFIELD_SEED = 7
+
+
+class Starfield:
+    def __init__(self, width, height, layers=STAR_LAYERS, seed=STARFIELD_SEED):
+        self.height = height
+        self.layers = []
+        rng = random.Random(seed)
+        for i, (count, speed, color, size) in enumerate(layers):
+            surface = pygame.Surface((width, height))
+            surface.fill((0, 0, 0))
+            for _ in range(count):
+                x = rng.randrange(width)
+                y = rng.randrange(height)
+                # Draw edge stars twice so the tile wraps without seams
+                for wrap in (-height, 0, height):
+                    surface.fill(color, (x, y + wrap, size, size))
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            # The far layer is opaque and doubles as the screen clear
+            if i > 0:
+                surface.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+            self.layers.append((surface, speed))
+
+    def draw(self, screen, tick):
+        # Offsets come from the simulation tick, so replays scroll identically
+        height = self.height
+        for surface, speed in self.layers:
+            offset = int(tick * speed) % height
+            screen.blit(surface, (0, offset - height))
+            screen.blit(surface, (0, offset))
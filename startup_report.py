@@ -0,0 +1,77 @@
+# Cold-start timing: fresh interpreters measured from launch to the first presented frame
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def child():
+    # Runs in the measured process; reports its own phase timings as JSON on stdout
+    # Saves go to a throwaway directory, so a measured start leaves nothing behind
+    with tempfile.TemporaryDirectory() as data_dir:
+        start = time.perf_counter()
+        import space_explorer as se
+        imported = time.perf_counter()
+        game = se.Game(data_dir=data_dir)
+        created = time.perf_counter()
+        game.draw()
+        first_frame = time.perf_counter()
+        wall_clock = time.time()
+        game.close()
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "game_init_ms": (created - imported) * 1000,
+        "first_frame_ms": (first_frame - created) * 1000,
+        "first_frame_at": wall_clock,
+    }))
+
+
+def measure(runs, env):
+    samples = []
+    for _ in range(runs):
+        # An empty interpreter launch gives the fixed cost the game cannot affect
+        launched = time.time()
+        subprocess.run([sys.executable, "-c", "pass"], env=env, check=True)
+        interpreter_ms = (time.time() - launched) * 1000
+
+        launched = time.time()
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"], env=env,
+                                check=True, capture_output=True, text=True)
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        report["interpreter_ms"] = interpreter_ms
+        report["cold_start_ms"] = (report.pop("first_frame_at") - launched) * 1000
+        samples.append(report)
+    return {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Space Explorer cold start to first frame")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--headless", action="store_true", help="use the SDL dummy video driver")
+    parser.add_argument("--json", action="store_true", help="print the medians as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child()
+        return 0
+
+    env = dict(os.environ)
+    if args.headless:
+        env.setdefault("SDL_VIDEODRIVER", "dummy")
+        env.setdefault("SDL_AUDIODRIVER", "dummy")
+    report = measure(args.runs, env)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"median of {args.runs} cold starts")
+        for key in ("interpreter_ms", "import_ms", "game_init_ms", "first_frame_ms", "cold_start_ms"):
+            print(f"  {key:<16} {report[key]:8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# Enemies held as NumPy columns and updated in one batched pass: descent, homing,
+# flocking, firing and aim
+import numpy as np
+
+from waves import fire_aimed, fire_straight, move_descend, move_home
+
+MOVE_KERNELS = {move_descend: 0, move_home: 1}
+FIRE_KERNELS = {fire_straight: 0, fire_aimed: 1}
+# Enemies only open fire once they are this far down the screen
+FIRE_LINE = 50
+COLUMNS = ("x", "y", "prev_x", "prev_y", "speed", "health", "max_health", "cooldown", "code")
+
+
+class Swarm:
+    # Vectorized mode's enemy container: one row per enemy, in spawn order like the list
+    # it replaces, with per-archetype values looked up through each row's code
+    def __init__(self, bottom, capacity=64):
+        self.bottom = bottom
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        # Position before the last update(), for drawing between ticks
+        self.prev_x = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.health = np.zeros(capacity, dtype=np.int64)
+        self.max_health = np.zeros(capacity, dtype=np.int64)
+        self.cooldown = np.zeros(capacity, dtype=np.int64)
+        self.code = np.zeros(capacity, dtype=np.intp)
+        self.codes = {}
+        self.archetypes = []
+        self.radius = np.zeros(0, dtype=np.int64)
+        self.homing = np.zeros(0)
+        self.aimed = np.zeros(0, dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, size):
+        capacity = len(self.x)
+        while capacity < size:
+            capacity *= 2
+        for name in COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def _code(self, archetype):
+        code = self.codes.get(archetype)
+        if code is None:
+            code = self.codes[archetype] = len(self.archetypes)
+            self.archetypes.append(archetype)
+            self.radius = np.append(self.radius, archetype.radius)
+            homing = archetype.homing_rate if MOVE_KERNELS[archetype.move] else 0
+            self.homing = np.append(self.homing, homing)
+            self.aimed = np.append(self.aimed, bool(FIRE_KERNELS[archetype.fire]))
+        return code
+
+    def append(self, enemy):
+        # Takes over a freshly built Enemy's state, so spawns draw from the RNG exactly as
+        # the list mode does
+        if self.count == len(self.x):
+            self._grow(self.count + 1)
+        i = self.count
+        self.x[i] = self.prev_x[i] = enemy.x
+        self.y[i] = self.prev_y[i] = enemy.y
+        self.speed[i] = enemy.speed
+        self.health[i] = enemy.health
+        self.max_health[i] = enemy.max_health
+        self.cooldown[i] = enemy.shoot_cooldown
+        self.code[i] = self._code(enemy.archetype)
+        self.count = i + 1
+
+    def load(self, x, y, speed, health, max_health, cooldown, archetypes):
+        # Replace the contents with columns; archetypes holds one archetype per row
+        n = len(x)
+        if n > len(self.x):
+            self._grow(n)
+        self.count = n
+        if not n:
+            return
+        self.x[:n] = self.prev_x[:n] = np.asarray(x, dtype=np.float64)
+        self.y[:n] = self.prev_y[:n] = np.asarray(y, dtype=np.float64)
+        self.speed[:n] = np.asarray(speed, dtype=np.float64)
+        self.health[:n] = np.asarray(health, dtype=np.int64)
+        self.max_health[:n] = np.asarray(max_health, dtype=np.int64)
+        self.cooldown[:n] = np.asarray(cooldown, dtype=np.int64)
+        self.code[:n] = [self._code(archetype) for archetype in archetypes]
+
+    def clear(self):
+        self.count = 0
+
+    def copy(self):
+        # Detached copy of the live rows for another thread to draw
+        clone = Swarm.__new__(Swarm)
+        clone.__dict__.update(self.__dict__)
+        n = self.count
+        for name in COLUMNS:
+            setattr(clone, name, getattr(self, name)[:n].copy())
+        clone.codes = dict(self.codes)
+        clone.archetypes = list(self.archetypes)
+        return clone
+
+    def compact(self, keep):
+        # Unlike EntityStore, survivors keep their order: collisions and the RNG walk
+        # enemies in list order
+        n = self.count
+        survivors = int(np.count_nonzero(keep))
+        if survivors == n:
+            return
+        for name in COLUMNS:
+            array = getattr(self, name)
+            array[:survivors] = array[:n][keep]
+        self.count = survivors
+
+    def discard(self, indices):
+        keep = np.ones(self.count, dtype=bool)
+        keep[list(indices)] = False
+        self.compact(keep)
+
+    def circles(self):
+        # (x, y, radius) per enemy, for the collision grid
+        n = self.count
+        return list(zip(self.x[:n].tolist(), self.y[:n].tolist(), self.radius[self.code[:n]].tolist()))
+
+    def overlapping(self, x, y, radius):
+        n = self.count
+        dx = self.x[:n] - x
+        dy = self.y[:n] - y
+        reach = self.radius[self.code[:n]] + radius
+        return np.flatnonzero(dx*dx + dy*dy < reach*reach).tolist()
+
+    def checksum_rows(self):
+        # (x, y, health, cooldown) per enemy as float64 bytes, the layout Simulation.checksum
+        # hashes for list-mode enemies
+        n = self.count
+        return np.column_stack((self.x[:n], self.y[:n], self.health[:n], self.cooldown[:n])).tobytes()
+
+    def rows(self, alpha=1.0):
+        # (x, y, code, health, max health) per enemy, drawn alpha of the way from the
+        # previous tick's position to the current one
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        if alpha < 1:
+            x = self.prev_x[:n] + (x - self.prev_x[:n]) * alpha
+            y = self.prev_y[:n] + (y - self.prev_y[:n]) * alpha
+        return zip(x.tolist(), y.tolist(), self.code[:n].tolist(), self.health[:n].tolist(),
+                   self.max_health[:n].tolist())
+
+    def update(self, players, bullets, rng):
+        # Same order of operations as Enemy.update, so small waves play out identically
+        n = self.count
+        if not n:
+            return
+        codes = self.code[:n]
+        x = self.x[:n]
+        y = self.y[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+        y += self.speed[:n]
+        cooldown = self.cooldown[:n]
+
+        # Each enemy steers for and aims at the horizontally nearest live player
+        if len(players) == 1:
+            target_x = players[0].x
+            target_y = players[0].y
+        else:
+            px = np.array([p.x for p in players], dtype=np.float64)
+            py = np.array([p.y for p in players], dtype=np.float64)
+            nearest = np.abs(x[:, None] - px[None, :]).argmin(axis=1)
+            target_x = px[nearest]
+            target_y = py[nearest]
+
+        # Homing: a fixed sideways step towards the target once more than 5px away
+        homing = self.homing[codes]
+        dx = target_x - x
+        x += np.where(np.abs(dx) > 5, np.where(dx > 0, homing, -homing), 0)
+
+        for code, archetype in enumerate(self.archetypes):
+            if archetype.separation or archetype.cohesion:
+                members = np.flatnonzero(codes == code)
+                if len(members) > 1:
+                    self._flock(archetype, members, x, y)
+
+        # Firing decisions and aim vectors for the whole swarm at once
+        cooldown -= 1
+        firing = np.flatnonzero((cooldown <= 0) & (y > FIRE_LINE))
+        if len(firing):
+            if len(players) > 1:
+                target_x = target_x[firing]
+                target_y = target_y[firing]
+            self._fire(firing, codes, x, y, target_x, target_y, bullets)
+            archetypes = self.archetypes
+            fire_codes = codes[firing].tolist()
+            # Reloads are drawn one by one in list order to keep the RNG stream unchanged
+            for i, code in zip(firing.tolist(), fire_codes):
+                cooldown[i] = rng.randint(*archetypes[code].reload)
+
+        below = y > self.bottom
+        if below.any():
+            self.compact(~below)
+
+    def _flock(self, archetype, members, x, y):
+        # Pairwise separation inside one archetype, plus an optional pull towards its centre
+        mx = x[members]
+        my = y[members]
+        if archetype.separation:
+            # Candidate pairs come from a sweep over x, so only near neighbours are compared
+            radius = archetype.separation
+            n = len(members)
+            order = np.argsort(mx, kind="stable")
+            sx = mx[order]
+            sy = my[order]
+            ahead = np.searchsorted(sx, sx + radius) - np.arange(n) - 1
+            total = int(ahead.sum())
+            if total:
+                i = np.repeat(np.arange(n), ahead)
+                j = i + 1 + np.arange(total) - np.repeat(np.cumsum(ahead) - ahead, ahead)
+                dx = sx[i] - sx[j]
+                dy = sy[i] - sy[j]
+                d2 = dx*dx + dy*dy
+                near = (d2 < radius * radius) & (d2 > 0)
+                if near.any():
+                    i = i[near]
+                    j = j[near]
+                    dist = np.sqrt(d2[near])
+                    push = (radius - dist) / (radius * dist) * archetype.separation_strength
+                    px = dx[near] * push
+                    py = dy[near] * push
+                    # Each pair pushes both members apart
+                    index = np.concatenate((order[i], order[j]))
+                    x[members] = mx + np.bincount(index, np.concatenate((px, -px)), n)
+                    y[members] = my + np.bincount(index, np.concatenate((py, -py)), n)
+        if archetype.cohesion:
+            x[members] += (x[members].mean() - x[members]) * archetype.cohesion
+
+    def _fire(self, firing, codes, x, y, target_x, target_y, bullets):
+        # Targets are scalars or arrays lined up with firing
+        fire_codes = codes[firing]
+        for code in np.unique(fire_codes).tolist():
+            archetype = self.archetypes[code]
+            in_group = fire_codes == code
+            group = firing[in_group]
+            gx = x[group]
+            gy = y[group]
+            if self.aimed[code]:
+                tx = target_x[in_group] if np.ndim(target_x) else target_x
+                ty = target_y[in_group] if np.ndim(target_y) else target_y
+                dx = tx - gx
+                dy = ty - gy
+                distance = np.sqrt(dx*dx + dy*dy)
+                ok = distance > 0
+                if not ok.all():
+                    gx, gy, dx, dy, distance = gx[ok], gy[ok], dx[ok], dy[ok], distance[ok]
+                vel_x = (dx / distance) * archetype.bullet_speed
+                vel_y = (dy / distance) * archetype.bullet_speed
+            else:
+                vel_x = np.zeros(len(group))
+                vel_y = np.full(len(group), float(archetype.bullet_speed))
+            if len(gx):
+                bullets.spawn_volley(gx, gy + archetype.bullet_offset, vel_x, vel_y, archetype.bullet_color)
@@ -0,0 +1,161 @@
+# Declarative enemy archetypes and wave scripts, compiled into per-wave spawn tables
+import hashlib
+import json
+import math
+import os
+import pickle
+
+# Bump when the compiled layout changes so stale caches are ignored
+COMPILER_VERSION = 2
+CACHE_DIR = ".campaign_cache"
+# Waves compiled from an "endless" progression before the last one repeats
+ENDLESS_WAVES = 100
+
+
+# Movement behaviours: called once per tick after the enemy has descended
+def move_descend(enemy, player):
+    pass
+
+
+def move_home(enemy, player):
+    dx = player.x - enemy.x
+    if abs(dx) > 5:
+        enemy.x += enemy.archetype.homing_rate if dx > 0 else -enemy.archetype.homing_rate
+
+
+# Firing behaviours
+def fire_straight(enemy, player, bullets):
+    arch = enemy.archetype
+    bullets.spawn(enemy.x, enemy.y + arch.bullet_offset, 0, arch.bullet_speed, arch.bullet_color)
+
+
+def fire_aimed(enemy, player, bullets):
+    arch = enemy.archetype
+    dx = player.x - enemy.x
+    dy = player.y - enemy.y
+    distance = math.sqrt(dx*dx + dy*dy)
+    if distance > 0:
+        vel_x = (dx / distance) * arch.bullet_speed
+        vel_y = (dy / distance) * arch.bullet_speed
+        bullets.spawn(enemy.x, enemy.y + arch.bullet_offset, vel_x, vel_y, arch.bullet_color)
+
+
+MOVES = {"descend": move_descend, "home": move_home}
+FIRES = {"straight": fire_straight, "aimed": fire_aimed}
+
+
+class Archetype:
+    def __init__(self, name, spec):
+        self.name = name
+        self.health = spec["health"]
+        self.color = tuple(spec["color"])
+        self.radius = spec.get("radius", 12)
+        self.speed = tuple(spec["speed"])
+        self.first_shot = tuple(spec["first_shot"])
+        self.reload = tuple(spec["reload"])
+        self.move = MOVES[spec.get("move", "descend")]
+        self.fire = FIRES[spec.get("fire", "straight")]
+        self.homing_rate = spec.get("homing_rate", 1)
+        self.bullet_speed = spec["bullet_speed"]
+        self.bullet_color = tuple(spec.get("bullet_color", spec["color"]))
+        self.bullet_offset = spec.get("bullet_offset", 0)
+        self.score = spec["score"]
+        self.health_bar = spec.get("health_bar", False)
+        # Flocking steering, applied by the NumPy swarm (0 disables it)
+        self.separation = spec.get("separation", 0)
+        self.separation_strength = spec.get("separation_strength", 1.0)
+        self.cohesion = spec.get("cohesion", 0)
+
+
+class Wave:
+    def __init__(self, spawn_interval, kill_target, kills, mix):
+        self.spawn_interval = spawn_interval
+        self.kill_target = kill_target
+        self.kills = kills
+        # Cumulative thresholds checked in order against one uniform draw
+        total = sum(weight for _, weight in mix)
+        running = 0.0
+        self.thresholds = []
+        self.archetypes = []
+        for archetype, weight in mix:
+            running += weight / total
+            self.thresholds.append(running)
+            self.archetypes.append(archetype)
+        self.thresholds[-1] = 1.0
+
+    def pick(self, roll):
+        for threshold, archetype in zip(self.thresholds, self.archetypes):
+            if roll < threshold:
+                return archetype
+        return self.archetypes[-1]
+
+
+class Campaign:
+    def __init__(self, archetypes, waves):
+        self.archetypes = archetypes
+        self.waves = waves
+
+    def wave(self, number):
+        # 1-based; past the script the last wave repeats with a rising kill target
+        if number <= len(self.waves):
+            return self.waves[number - 1]
+        last = self.waves[-1]
+        extra = number - len(self.waves)
+        return Wave(last.spawn_interval, last.kill_target + extra * last.kills, last.kills,
+                    list(zip(last.archetypes, _weights(last.thresholds))))
+
+
+def _weights(thresholds):
+    previous = 0.0
+    weights = []
+    for threshold in thresholds:
+        weights.append(threshold - previous)
+        previous = threshold
+    return weights
+
+
+def _interval(spec, number):
+    if isinstance(spec, dict):
+        return max(spec.get("min", 1), spec["start"] + spec["step"] * number)
+    return spec
+
+
+def compile_campaign(data):
+    archetypes = {name: Archetype(name, spec) for name, spec in data["archetypes"].items()}
+    scripted = list(data.get("waves", []))
+    endless = data.get("endless")
+    if endless:
+        scripted.extend([endless] * (ENDLESS_WAVES - len(scripted)))
+    if not scripted:
+        raise ValueError("Campaign defines no waves")
+
+    waves = []
+    kill_target = 0
+    for number, spec in enumerate(scripted, 1):
+        kill_target += spec["kills"]
+        mix = [(archetypes[name], weight) for name, weight in spec["mix"]]
+        waves.append(Wave(_interval(spec["spawn_interval"], number), kill_target, spec["kills"], mix))
+    return Campaign(archetypes, waves)
+
+
+def load_campaign(path, cache_dir=CACHE_DIR):
+    # Compiled campaigns are pickled next to a hash of the source, so edits recompile
+    with open(path, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha256(source + bytes([COMPILER_VERSION])).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f"{os.path.basename(path)}.{digest}.pickle")
+    try:
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    campaign = compile_campaign(json.loads(source))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(campaign, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return campaign